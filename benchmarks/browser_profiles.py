@@ -0,0 +1,165 @@
+"""Compare the cost of one crawl under each browser profile.
+
+Each crawl runs in a fresh child process so that the resource usage of the
+browser it starts can be measured in isolation. Reported per crawl:
+
+- wall time of the child process
+- CPU time (user + system) of the child and every process it reaped,
+  which includes chromedriver and Chrome
+- peak RSS of the whole process tree (the child, chromedriver and every
+  Chrome process), summed from /proc while the crawl runs
+
+A crawl that aborts or extracts no hotels fails the benchmark. With --url,
+the crawl waits for any hotel listing instead of the Istanbul target hotel.
+
+Usage:
+    python benchmarks/browser_profiles.py --runs 3
+    python benchmarks/browser_profiles.py --url http://localhost:8000/hotels.html
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import threading
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+
+# Seconds between RSS samples of the process tree
+RSS_SAMPLE_INTERVAL = 0.2
+
+
+def tree_rss_bytes(root_pid):
+    """Return the summed RSS of root_pid and all of its descendants
+
+    Processes are found through /proc, so this only works on Linux.
+    """
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; fields follow the last ')'
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total, pending = 0, [root_pid]
+    while pending:
+        pid = pending.pop()
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+        pending.extend(children.get(pid, []))
+    return total
+
+
+class _RssSampler(threading.Thread):
+    """Track the peak RSS of this process tree until stopped"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopped = threading.Event()
+        self.peak = 0
+
+    def run(self):
+        while True:
+            self.peak = max(self.peak, tree_rss_bytes(os.getpid()))
+            if self.stopped.wait(RSS_SAMPLE_INTERVAL):
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.peak
+
+
+def run_one(profile, url):
+    """Run a single crawl in this process and print its result as JSON"""
+    import main
+
+    # A custom page has no Istanbul target hotel to wait for
+    ready_selector = main.HOTEL_ITEM_SELECTOR if url else main.TARGET_HOTEL_SELECTOR
+    if url is None:
+        checkin, checkout = main.find_next_weekend()
+        url = main.get_hotel_url("istanbul-250-60649-2", checkin, checkout, 2)
+
+    sampler = _RssSampler()
+    sampler.start()
+    driver = main.create_driver(profile)
+    try:
+        hotels, stats, _ = main.crawl_hotels(driver, url, ready_selector)
+    finally:
+        # Always quit here, even for the interactive profile, so that the
+        # browser's resource usage is collected by the parent
+        driver.quit()
+        peak_rss = sampler.stop()
+
+    if stats['error'] or not hotels:
+        sys.exit(f"Crawl of {url} failed: {stats['error'] or 'no hotels extracted'}")
+    print(json.dumps({'hotels': len(hotels), 'failed': stats['failed'], 'peak_rss': peak_rss}))
+
+
+def measure(profile, url):
+    """Run one crawl in a child process and measure it
+
+    Returns:
+    dict -- wall_s, cpu_s, tree_rss_mb and the number of hotels crawled
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', profile]
+    if url:
+        cmd += ['--url', url]
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT_DIR)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"{profile} crawl failed:\n{result.stderr}")
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+
+    return {
+        'wall_s': wall,
+        'cpu_s': (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime),
+        'tree_rss_mb': summary['peak_rss'] / (1024 * 1024),
+        'hotels': summary['hotels'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark browser profiles for a crawl")
+    parser.add_argument('--runs', type=int, default=3, help="Crawls per profile")
+    parser.add_argument('--url', help="Search URL to crawl (defaults to next weekend in Istanbul)")
+    parser.add_argument('--profiles', nargs='+', default=['interactive', 'production'])
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_one(args.child, args.url)
+        return
+
+    print(f"{'Profile':<14}{'Wall (s)':>10}{'CPU (s)':>10}{'Tree RSS (MB)':>15}{'Hotels':>8}")
+    print("-" * 57)
+    for profile in args.profiles:
+        runs = [measure(profile, args.url) for _ in range(args.runs)]
+        print(f"{profile:<14}"
+              f"{statistics.median(r['wall_s'] for r in runs):>10.2f}"
+              f"{statistics.median(r['cpu_s'] for r in runs):>10.2f}"
+              f"{max(r['tree_rss_mb'] for r in runs):>15.1f}"
+              f"{runs[-1]['hotels']:>8}")
+
+
+if __name__ == "__main__":
+    main()
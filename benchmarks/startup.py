@@ -0,0 +1,80 @@
+"""Measure the import cost of each pipeline entry point.
+
+Every module is imported in a fresh interpreter with ``-X importtime`` and
+the cumulative import time of the module itself is reported (median over
+several runs), together with the heaviest imports it pulls in.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --modules value_analysis scoring
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ['hotel_finder', 'main', 'value_analysis', 'scoring', 'entity_index',
+                   'image_cache', 'exporters', 'hotel_dashboard']
+
+
+def import_times(module=None):
+    """Import a module in a fresh interpreter
+
+    Arguments:
+    module {str} -- Module to import; None measures interpreter startup only
+
+    Returns:
+    dict -- imported package name -> cumulative import time in microseconds
+    """
+    code = f'import {module}' if module else 'pass'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=ROOT_DIR,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, package = line[len('import time:'):].split('|')
+        times[package.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time of the entry points")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument('--top', type=int, default=3, help="Heaviest imports to list per module")
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES)
+    args = parser.parse_args()
+
+    # Modules loaded by the interpreter itself (site, .pth hooks) are
+    # not caused by our code and are left out of the breakdown
+    startup_modules = set(import_times())
+
+    print(f"{'Module':<18}{'Import (ms)':>12}  Heaviest imports (ms)")
+    print("-" * 80)
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.runs)]
+        total = statistics.median(run[module] for run in runs) / 1000
+
+        # Top-level packages only, so that e.g. pandas is not listed
+        # again as pandas.core
+        last = runs[-1]
+        heaviest = sorted(
+            (name for name in last
+             if name != module and '.' not in name and name not in startup_modules),
+            key=last.get, reverse=True,
+        )[:args.top]
+        details = ', '.join(f"{name} {last[name] / 1000:.0f}" for name in heaviest)
+        print(f"{module:<18}{total:>12.1f}  {details}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import time
+import sqlite3
+
+DEFAULT_QUEUE_PATH = 'crawl_queue.sqlite'
+
+# Seconds a worker may hold a job without renewing its lease
+DEFAULT_LEASE_SECONDS = 300
+
+# Attempts (leases) per job before it is marked as failed
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Seconds to wait for another process holding the database lock
+BUSY_TIMEOUT_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY,
+    city_code TEXT NOT NULL,
+    checkin TEXT NOT NULL,
+    checkout TEXT NOT NULL,
+    adults INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result_path TEXT,
+    last_error TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (city_code, checkin, checkout, adults)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, job_id);
+"""
+
+JOB_STATUSES = ('pending', 'leased', 'done', 'failed')
+
+def open_queue(path=DEFAULT_QUEUE_PATH):
+    """Open (and create if needed) a crawl job queue
+
+    The queue is a SQLite file, so several processes on one machine can
+    share it without any external service. Each process should open its
+    own connection.
+
+    Arguments:
+    path {str} -- Path to the SQLite file
+
+    Returns:
+    sqlite3.Connection -- Connection in autocommit mode
+    """
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def enqueue_jobs(conn, jobs):
+    """Add crawl jobs to the queue, skipping ones that already exist
+
+    Arguments:
+    conn -- Connection from open_queue
+    jobs -- Iterable of dictionaries with city_code, checkin, checkout,
+        adults and url
+
+    Returns:
+    int -- Number of new jobs
+    """
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        before = conn.total_changes
+        conn.executemany(
+            'INSERT OR IGNORE INTO jobs (city_code, checkin, checkout, adults, url, updated_at) '
+            'VALUES (:city_code, :checkin, :checkout, :adults, :url, :now)',
+            (dict(job, now=now) for job in jobs)
+        )
+        added = conn.total_changes - before
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return added
+
+def requeue_expired(conn, max_attempts=DEFAULT_MAX_ATTEMPTS, now=None):
+    """Return jobs whose lease expired to the queue
+
+    Jobs that have already used max_attempts leases are marked as failed.
+
+    Returns:
+    int -- Number of jobs re-queued or failed
+    """
+    now = now or time.time()
+    cursor = conn.execute(
+        "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+        "lease_owner = NULL, lease_expires = NULL, updated_at = ?, "
+        "last_error = COALESCE(last_error, 'lease expired') "
+        "WHERE status = 'leased' AND lease_expires < ?",
+        (max_attempts, now, now)
+    )
+    return cursor.rowcount
+
+def lease_job(conn, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Lease the oldest pending job
+
+    Expired leases are re-queued first, so a crashed worker's job is picked
+    up by the next worker that asks for work.
+
+    Arguments:
+    conn -- Connection from open_queue
+    worker_id {str} -- Identifier of the leasing worker
+    lease_seconds {float} -- Lease duration; renew with renew_lease
+
+    Returns:
+    dict or None -- The leased job, or None if no job is pending
+    """
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        requeue_expired(conn, max_attempts, now)
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'pending' ORDER BY job_id LIMIT 1"
+        ).fetchone()
+        if row is None:
+            conn.execute('COMMIT')
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+            "lease_expires = ?, updated_at = ? WHERE job_id = ?",
+            (worker_id, now + lease_seconds, now, row['job_id'])
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    job = dict(row)
+    job['attempts'] += 1
+    return job
+
+def renew_lease(conn, job_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Extend a lease held by worker_id
+
+    Returns:
+    bool -- False if the worker no longer holds the lease
+    """
+    now = time.time()
+    cursor = conn.execute(
+        "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+        "WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+        (now + lease_seconds, now, job_id, worker_id)
+    )
+    return cursor.rowcount == 1
+
+def complete_job(conn, job_id, worker_id, result_path=None):
+    """Mark a leased job as done
+
+    Returns:
+    bool -- False if the worker no longer holds the lease
+    """
+    cursor = conn.execute(
+        "UPDATE jobs SET status = 'done', result_path = ?, lease_owner = NULL, "
+        "lease_expires = NULL, last_error = NULL, updated_at = ? "
+        "WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+        (result_path, time.time(), job_id, worker_id)
+    )
+    return cursor.rowcount == 1
+
+def fail_job(conn, job_id, worker_id, error, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Give a leased job back after an error
+
+    The job is re-queued, or marked as failed once it used max_attempts.
+
+    Returns:
+    bool -- False if the worker no longer holds the lease
+    """
+    cursor = conn.execute(
+        "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+        "lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ? "
+        "WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+        (max_attempts, str(error), time.time(), job_id, worker_id)
+    )
+    return cursor.rowcount == 1
+
+def queue_counts(conn):
+    """Return the number of jobs per status"""
+    counts = dict.fromkeys(JOB_STATUSES, 0)
+    counts.update(tuple(row) for row in conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'))
+    return counts
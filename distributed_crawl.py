@@ -0,0 +1,350 @@
+import os
+import time
+import json
+import socket
+import argparse
+import importlib
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import main
+import crawl_queue
+import rate_control
+
+DEFAULT_OUTPUT_DIR = 'crawl_results'
+
+# Seconds an idle worker waits before asking the queue for work again
+POLL_INTERVAL = 5
+
+# Seconds between queue status lines printed by the coordinator
+MONITOR_INTERVAL = 10
+
+DEFAULT_CRAWLER = 'distributed_crawl:BrowserCrawler'
+
+def next_weekends(count):
+    """Returns the next count weekends (friday and sunday)
+
+    Returns:
+    list -- (str, str) tuples of dates in "YYYYMMDD" format
+    """
+    friday = datetime.strptime(main.find_next_weekend()[0], "%Y%m%d")
+    weekends = []
+    for week in range(count):
+        start = friday + timedelta(weeks=week)
+        weekends.append((start.strftime("%Y%m%d"), (start + timedelta(2)).strftime("%Y%m%d")))
+    return weekends
+
+def build_jobs(city_codes, date_pairs, adults_options):
+    """Build one crawl job per city, date range and number of adults
+
+    Returns:
+    list -- Job dictionaries for crawl_queue.enqueue_jobs
+    """
+    return [
+        {
+            'city_code': city_code,
+            'checkin': checkin,
+            'checkout': checkout,
+            'adults': adults,
+            'url': main.get_hotel_url(city_code, checkin, checkout, adults),
+        }
+        for city_code in city_codes
+        for checkin, checkout in date_pairs
+        for adults in adults_options
+    ]
+
+def result_filename(job):
+    """Returns the name of the JSON file holding a job's results"""
+    return f"{job['city_code']}_{job['checkin']}-{job['checkout']}_{job['adults']}ad.json"
+
+class BrowserCrawler:
+    """Crawl jobs with one Chrome instance that is reused across jobs
+
+    Requests are paced by a rate controller per host whose state lives in
+    rate_state, so all workers using the same file share one budget.
+    """
+
+    def __init__(self, rate_state=rate_control.PRIVATE_STATE, profile='production'):
+        self.rate_state = rate_state
+        self.profile = profile
+        self.driver = None
+        self.rates = {}
+
+    def __call__(self, job):
+        if self.driver is None:
+            self.driver = main.create_driver(self.profile)
+        host = urlsplit(job['url']).netloc
+        if host not in self.rates:
+            self.rates[host] = rate_control.RateController(host, self.rate_state)
+        hotels, stats, dead_letter = main.crawl_hotels(self.driver, job['url'], main.HOTEL_ITEM_SELECTOR,
+                                                       self.rates[host])
+        main.print_run_summary(stats, dead_letter)
+        if stats['error'] or not hotels:
+            # The browser may be in a bad state; start a fresh one next time
+            self.close()
+        if stats['error']:
+            # A partial listing is not a result; let the job be retried
+            raise RuntimeError(f"crawl aborted after {len(hotels)} hotels: {stats['error']}")
+        return hotels
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
+
+def load_crawler(spec, rate_state=rate_control.PRIVATE_STATE):
+    """Create a crawler from a "module:factory" string
+
+    The factory is called with the path of the shared rate state and must
+    return a callable taking a job dictionary and returning a list of
+    hotels. It may have a close() method, which is called when the worker
+    stops.
+    """
+    module_name, _, factory_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), factory_name)(rate_state)
+
+class _LeaseKeeper(threading.Thread):
+    """Renew a job lease in the background while the job is being crawled"""
+
+    def __init__(self, queue_path, job_id, worker_id, lease_seconds):
+        super().__init__(daemon=True)
+        self.queue_path = queue_path
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        conn = crawl_queue.open_queue(self.queue_path)
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3):
+                if not crawl_queue.renew_lease(conn, self.job_id, self.worker_id, self.lease_seconds):
+                    return
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def write_results(hotels, output_dir, job):
+    """Write a job's hotels to its JSON file in output_dir
+
+    The file is written under a temporary name and renamed, so a worker
+    that dies mid-write never leaves a partial result behind.
+
+    Returns:
+    str -- Path of the result file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, result_filename(job))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(hotels, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+    return path
+
+def run_worker(queue_path=crawl_queue.DEFAULT_QUEUE_PATH, output_dir=DEFAULT_OUTPUT_DIR,
+               worker_id=None, crawler=DEFAULT_CRAWLER, index_path=None,
+               lease_seconds=crawl_queue.DEFAULT_LEASE_SECONDS,
+               max_attempts=crawl_queue.DEFAULT_MAX_ATTEMPTS, wait_for_work=False):
+    """Lease and crawl jobs until the queue is drained
+
+    Results are written to output_dir and, if index_path is given, merged
+    into the entity index. The lease is renewed while a job runs, so only
+    jobs of workers that died are re-queued. Request rates are kept in the
+    queue database, so all workers of a queue share one budget per host.
+
+    Arguments:
+    queue_path {str} -- Queue database
+    output_dir {str} -- Directory for per-job result files
+    worker_id {str} -- Unique worker name (host and PID by default)
+    crawler {str} -- "module:factory" creating the crawl callable
+    index_path {str} -- Entity index database to merge results into (optional)
+    lease_seconds {float} -- Lease duration
+    max_attempts {int} -- Attempts per job before it is marked as failed
+    wait_for_work {bool} -- Keep polling when the queue is empty instead of exiting
+
+    Returns:
+    dict -- Number of jobs this worker completed and failed
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    conn = crawl_queue.open_queue(queue_path)
+    crawl = load_crawler(crawler, queue_path)
+    index = None
+    if index_path:
+        import entity_index
+        index = entity_index.open_index(index_path)
+    counts = {'done': 0, 'failed': 0}
+
+    try:
+        while True:
+            job = crawl_queue.lease_job(conn, worker_id, lease_seconds, max_attempts)
+            if job is None:
+                status = crawl_queue.queue_counts(conn)
+                # Leased jobs may still come back if their worker died
+                if not wait_for_work and status['leased'] == 0:
+                    break
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            print(f"[{worker_id}] Job {job['job_id']} (attempt {job['attempts']}): {job['url']}")
+            keeper = _LeaseKeeper(queue_path, job['job_id'], worker_id, lease_seconds)
+            keeper.start()
+            try:
+                hotels = crawl(job)
+                if not hotels:
+                    raise RuntimeError("no hotels extracted")
+                result_path = write_results(hotels, output_dir, job)
+                if index is not None:
+                    context = {field: job[field] for field in entity_index.CONTEXT_FIELDS}
+                    entity_index.ingest_files(index, [result_path], context)
+            except Exception as e:
+                keeper.stop()
+                crawl_queue.fail_job(conn, job['job_id'], worker_id, e, max_attempts)
+                counts['failed'] += 1
+                print(f"[{worker_id}] Job {job['job_id']} failed: {e}")
+                continue
+            keeper.stop()
+
+            if crawl_queue.complete_job(conn, job['job_id'], worker_id, result_path):
+                counts['done'] += 1
+                print(f"[{worker_id}] Job {job['job_id']} done: {len(hotels)} hotels -> {result_path}")
+            else:
+                # Another worker took over after our lease expired; its
+                # result overwrites the same file
+                print(f"[{worker_id}] Lost the lease on job {job['job_id']}; result kept at {result_path}")
+    finally:
+        if hasattr(crawl, 'close'):
+            crawl.close()
+        if index is not None:
+            index.close()
+        conn.close()
+
+    print(f"[{worker_id}] Finished: {counts['done']} jobs done, {counts['failed']} failed")
+    return counts
+
+def start_workers(count, **worker_args):
+    """Start count worker processes on this machine
+
+    Returns:
+    list -- The started multiprocessing.Process objects
+    """
+    context = multiprocessing.get_context('spawn')
+    host = socket.gethostname()
+    processes = []
+    for number in range(count):
+        process = context.Process(
+            target=run_worker,
+            kwargs=dict(worker_args, worker_id=f"{host}-w{number}-{os.getpid()}"),
+            name=f"crawl-worker-{number}",
+        )
+        process.start()
+        processes.append(process)
+    return processes
+
+def print_status(conn):
+    counts = crawl_queue.queue_counts(conn)
+    print(f"Jobs: {counts['pending']} pending, {counts['leased']} leased, "
+          f"{counts['done']} done, {counts['failed']} failed")
+    for host in rate_control.host_metrics(conn):
+        latency = f"{host['latency']:.2f}s" if host['latency'] is not None else "n/a"
+        print(f"Rate {host['host']}: {host['rate']:.2f} requests/s, latency {latency}, "
+              f"{host['errors']}/{host['requests']} errors")
+    return counts
+
+def coordinate(jobs, queue_path=crawl_queue.DEFAULT_QUEUE_PATH, workers=0,
+               max_attempts=crawl_queue.DEFAULT_MAX_ATTEMPTS, **worker_args):
+    """Enqueue jobs and watch the queue until every job is done or failed
+
+    Expired leases are re-queued while monitoring, so jobs of workers that
+    died (on this machine or another) are crawled again.
+
+    Arguments:
+    jobs {list} -- Jobs from build_jobs
+    queue_path {str} -- Queue database
+    workers {int} -- Local worker processes to start (0 to rely on remote workers)
+    max_attempts {int} -- Attempts per job before it is marked as failed
+    worker_args -- Further keyword arguments for run_worker
+
+    Returns:
+    dict -- Final number of jobs per status
+    """
+    conn = crawl_queue.open_queue(queue_path)
+    added = crawl_queue.enqueue_jobs(conn, jobs)
+    print(f"Queued {added} new jobs ({len(jobs) - added} already in the queue)")
+
+    processes = start_workers(workers, queue_path=queue_path, max_attempts=max_attempts, **worker_args)
+    try:
+        while True:
+            crawl_queue.requeue_expired(conn, max_attempts)
+            counts = print_status(conn)
+            if counts['pending'] == 0 and counts['leased'] == 0:
+                break
+            if processes and not any(process.is_alive() for process in processes):
+                print("All local workers exited before the queue was drained")
+                break
+            time.sleep(MONITOR_INTERVAL)
+    finally:
+        for process in processes:
+            process.join()
+        conn.close()
+    return counts
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Distributed hotel crawling with a shared job queue")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_queue_option(subparser):
+        subparser.add_argument('--queue', default=crawl_queue.DEFAULT_QUEUE_PATH, help="Queue database")
+
+    def add_worker_options(subparser):
+        add_queue_option(subparser)
+        subparser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help="Directory for result files")
+        subparser.add_argument('--index', help="Entity index database to merge results into")
+        subparser.add_argument('--crawler', default=DEFAULT_CRAWLER, help="Crawler factory as module:callable")
+        subparser.add_argument('--lease-seconds', type=float, default=crawl_queue.DEFAULT_LEASE_SECONDS)
+        subparser.add_argument('--max-attempts', type=int, default=crawl_queue.DEFAULT_MAX_ATTEMPTS)
+
+    coordinator = subparsers.add_parser('coordinator', help="Queue city/date jobs and monitor them")
+    coordinator.add_argument('--cities', nargs='+', default=['istanbul-250-60649-2'],
+                             help="Full city codes from obilet.com search URLs")
+    coordinator.add_argument('--weekends', type=int, default=1, help="Number of upcoming weekends")
+    coordinator.add_argument('--adults', type=int, nargs='+', default=[2], help="Numbers of adults")
+    coordinator.add_argument('--workers', type=int, default=0, help="Local worker processes to start")
+    add_worker_options(coordinator)
+
+    worker = subparsers.add_parser('worker', help="Crawl jobs from the queue")
+    worker.add_argument('--processes', type=int, default=1, help="Worker processes to start")
+    worker.add_argument('--wait', action='store_true', help="Keep waiting for jobs when the queue is empty")
+    add_worker_options(worker)
+
+    status = subparsers.add_parser('status', help="Print the number of jobs per status")
+    add_queue_option(status)
+
+    args = parser.parse_args()
+    if args.command == 'status':
+        conn = crawl_queue.open_queue(args.queue)
+        print_status(conn)
+        conn.close()
+        return
+
+    worker_args = dict(output_dir=args.output_dir, index_path=args.index, crawler=args.crawler,
+                       lease_seconds=args.lease_seconds)
+    if args.command == 'coordinator':
+        jobs = build_jobs(args.cities, next_weekends(args.weekends), args.adults)
+        coordinate(jobs, args.queue, args.workers, args.max_attempts, **worker_args)
+    elif args.processes == 1:
+        run_worker(args.queue, max_attempts=args.max_attempts, wait_for_work=args.wait, **worker_args)
+    else:
+        processes = start_workers(args.processes, queue_path=args.queue, max_attempts=args.max_attempts,
+                                  wait_for_work=args.wait, **worker_args)
+        for process in processes:
+            process.join()
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,404 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import argparse
+import unicodedata
+from datetime import datetime
+
+DEFAULT_INDEX_PATH = 'hotels_index.sqlite'
+
+# Records written per executemany() call while ingesting
+INGEST_BATCH_SIZE = 1000
+
+# Attributes that describe the hotel itself and are stored once per entity
+STATIC_FIELDS = ('name', 'image_url', 'star_rating', 'location', 'distance_to_center', 'features')
+
+# Attributes observed by a single crawl and stored once per (entity, snapshot)
+FACT_FIELDS = ('review_score', 'review_text', 'review_count', 'price', 'daily_price', 'nights')
+
+# Search parameters of a crawl; prices are only comparable within one context
+CONTEXT_FIELDS = ('checkin', 'checkout', 'adults')
+
+# Context encoded in the result file names written by distributed_crawl
+_RESULT_NAME = re.compile(r'_(\d{8})-(\d{8})_(\d+)ad\.jsonl?$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    entity_key TEXT PRIMARY KEY,
+    hotel_id TEXT,
+    name TEXT,
+    image_url TEXT,
+    star_rating INTEGER,
+    location TEXT,
+    distance_to_center TEXT,
+    features TEXT,
+    first_snapshot INTEGER,
+    last_snapshot INTEGER
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    fallback_key TEXT PRIMARY KEY,
+    entity_key TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    snapshot_id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    version TEXT NOT NULL UNIQUE,
+    ingested_at TEXT NOT NULL,
+    records INTEGER NOT NULL DEFAULT 0,
+    checkin TEXT,
+    checkout TEXT,
+    adults INTEGER,
+    crawled_at TEXT
+);
+CREATE TABLE IF NOT EXISTS price_facts (
+    entity_key TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    review_score TEXT,
+    review_text TEXT,
+    review_count TEXT,
+    price TEXT,
+    daily_price TEXT,
+    nights TEXT,
+    PRIMARY KEY (entity_key, snapshot_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS price_facts_snapshot ON price_facts (snapshot_id);
+"""
+
+# Columns added to snapshots after the first release, created on open
+_SNAPSHOT_COLUMNS = (('checkin', 'TEXT'), ('checkout', 'TEXT'), ('adults', 'INTEGER'), ('crawled_at', 'TEXT'))
+
+def open_index(path=DEFAULT_INDEX_PATH):
+    """Open (and create if needed) an entity index database
+
+    Arguments:
+    path {str} -- Path to the SQLite file
+
+    Returns:
+    sqlite3.Connection -- Connection with the schema in place
+    """
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(snapshots)')}
+    for column, column_type in _SNAPSHOT_COLUMNS:
+        if column not in existing:
+            conn.execute(f'ALTER TABLE snapshots ADD COLUMN {column} {column_type}')
+    return conn
+
+def normalize_text(text):
+    """Normalize a name or address for matching
+
+    Case, accents, punctuation and repeated whitespace are ignored, so
+    "Swissôtel The Bosphorus, İstanbul" and "swissotel the bosphorus istanbul"
+    normalize to the same string.
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text).casefold())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(re.sub(r'[^\w]+', ' ', text).split())
+
+def fallback_key(hotel):
+    """Return the name + location key used when a hotel has no data-id
+
+    Arguments:
+    hotel {dict} -- Hotel record as produced by the scraper
+
+    Returns:
+    str -- Key of the form "nl:<hash>"
+    """
+    basis = f"{normalize_text(hotel.get('name'))}|{normalize_text(hotel.get('location'))}"
+    return 'nl:' + hashlib.sha1(basis.encode('utf-8')).hexdigest()[:20]
+
+def iter_records(path):
+    """Yield hotel records from a snapshot file
+
+    JSON Lines files (.jsonl) are read line by line; JSON files are expected
+    to hold a list of hotels, as written by main.save_to_json.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+def _snapshot_version(path):
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+def crawl_context(path):
+    """Return the crawl context of a snapshot file
+
+    checkin, checkout and adults are read from file names written by
+    distributed_crawl.result_filename and are None for other files;
+    crawled_at is the file's modification time.
+
+    Returns:
+    dict -- checkin, checkout, adults and crawled_at
+    """
+    context = dict.fromkeys(CONTEXT_FIELDS)
+    match = _RESULT_NAME.search(os.path.basename(path))
+    if match:
+        context.update(checkin=match.group(1), checkout=match.group(2), adults=int(match.group(3)))
+    context['crawled_at'] = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+    return context
+
+class _KeyResolver:
+    """Map hotel records to entity keys, caching aliases in memory"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.aliases = dict(conn.execute('SELECT fallback_key, entity_key FROM aliases'))
+        self.new_aliases = []
+        self.merges = []
+
+    def resolve(self, hotel):
+        fallback = fallback_key(hotel)
+        hotel_id = hotel.get('id')
+        if hotel_id:
+            entity_key = f'id:{hotel_id}'
+        else:
+            # Records without a data-id join the entity that was last seen
+            # with the same name and location
+            entity_key = self.aliases.get(fallback, fallback)
+        known = self.aliases.get(fallback)
+        if known is None or (hotel_id and known == fallback):
+            if known == fallback:
+                # An id-less entity turned out to be this hotel
+                self.merges.append((fallback, entity_key))
+            self.aliases[fallback] = entity_key
+            self.new_aliases.append((fallback, entity_key))
+        return entity_key
+
+    def flush(self):
+        self.conn.executemany(
+            'INSERT INTO aliases (fallback_key, entity_key) VALUES (?, ?) '
+            'ON CONFLICT (fallback_key) DO UPDATE SET entity_key = excluded.entity_key',
+            self.new_aliases
+        )
+        for old_key, new_key in self.merges:
+            old_entity = self.conn.execute(
+                f"SELECT {', '.join(STATIC_FIELDS)}, first_snapshot, last_snapshot "
+                'FROM entities WHERE entity_key = ?', (old_key,)
+            ).fetchone()
+            if old_entity is not None:
+                self.conn.execute(_MERGE_ENTITY, old_entity + (new_key,))
+            self.conn.execute(
+                'UPDATE OR IGNORE price_facts SET entity_key = ? WHERE entity_key = ?', (new_key, old_key)
+            )
+            self.conn.execute('DELETE FROM price_facts WHERE entity_key = ?', (old_key,))
+            self.conn.execute('DELETE FROM entities WHERE entity_key = ?', (old_key,))
+        self.new_aliases = []
+        self.merges = []
+
+_UPSERT_ENTITY = """
+INSERT INTO entities (entity_key, hotel_id, name, image_url, star_rating, location,
+                      distance_to_center, features, first_snapshot, last_snapshot)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (entity_key) DO UPDATE SET
+    hotel_id = COALESCE(excluded.hotel_id, hotel_id),
+    name = COALESCE(excluded.name, name),
+    image_url = COALESCE(excluded.image_url, image_url),
+    star_rating = COALESCE(excluded.star_rating, star_rating),
+    location = COALESCE(excluded.location, location),
+    distance_to_center = COALESCE(excluded.distance_to_center, distance_to_center),
+    features = COALESCE(excluded.features, features),
+    last_snapshot = MAX(last_snapshot, excluded.last_snapshot)
+"""
+
+# Fill in what the surviving entity lacks from the id-less entity merged into it
+_MERGE_ENTITY = f"""
+UPDATE entities SET
+    {', '.join(f'{field} = COALESCE({field}, ?)' for field in STATIC_FIELDS)},
+    first_snapshot = MIN(first_snapshot, ?),
+    last_snapshot = MAX(last_snapshot, ?)
+WHERE entity_key = ?
+"""
+
+_UPSERT_FACT = """
+INSERT INTO price_facts (entity_key, snapshot_id, review_score, review_text,
+                         review_count, price, daily_price, nights)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (entity_key, snapshot_id) DO UPDATE SET
+    review_score = excluded.review_score,
+    review_text = excluded.review_text,
+    review_count = excluded.review_count,
+    price = excluded.price,
+    daily_price = excluded.daily_price,
+    nights = excluded.nights
+"""
+
+def ingest_records(conn, records, source, version=None, context=None):
+    """Merge one snapshot of hotel records into the index
+
+    Static attributes are upserted once per entity, price facts once per
+    (entity, snapshot). Records are written in batches as they are read.
+
+    Arguments:
+    conn -- Connection from open_index
+    records -- Iterable of hotel dictionaries
+    source {str} -- Human-readable origin of the snapshot (e.g. file path)
+    version {str} -- Unique snapshot identifier; re-ingesting it is a no-op
+    context {dict} -- checkin, checkout, adults and crawled_at of the crawl;
+        missing values are unknown, except crawled_at which defaults to now
+
+    Returns:
+    int or None -- Number of records ingested, or None if already ingested
+    """
+    version = version or f"{source}:{datetime.now().isoformat()}"
+    context = context or {}
+    ingested_at = datetime.now().isoformat(timespec='seconds')
+    with conn:
+        if conn.execute('SELECT 1 FROM snapshots WHERE version = ?', (version,)).fetchone():
+            return None
+        snapshot_id = conn.execute(
+            'INSERT INTO snapshots (source, version, ingested_at, checkin, checkout, adults, crawled_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (source, version, ingested_at, *(context.get(field) for field in CONTEXT_FIELDS),
+             context.get('crawled_at') or ingested_at)
+        ).lastrowid
+
+        resolver = _KeyResolver(conn)
+        entity_rows, fact_rows, count = [], [], 0
+        for hotel in records:
+            entity_key = resolver.resolve(hotel)
+            features = hotel.get('features')
+            entity_rows.append((
+                entity_key, hotel.get('id'), hotel.get('name'), hotel.get('image_url'),
+                hotel.get('star_rating'), hotel.get('location'), hotel.get('distance_to_center'),
+                json.dumps(features, ensure_ascii=False) if features is not None else None,
+                snapshot_id, snapshot_id,
+            ))
+            fact_rows.append((entity_key, snapshot_id) + tuple(hotel.get(field) for field in FACT_FIELDS))
+            count += 1
+            if len(entity_rows) >= INGEST_BATCH_SIZE:
+                conn.executemany(_UPSERT_ENTITY, entity_rows)
+                conn.executemany(_UPSERT_FACT, fact_rows)
+                entity_rows, fact_rows = [], []
+
+        conn.executemany(_UPSERT_ENTITY, entity_rows)
+        conn.executemany(_UPSERT_FACT, fact_rows)
+        resolver.flush()
+        conn.execute('UPDATE snapshots SET records = ? WHERE snapshot_id = ?', (count, snapshot_id))
+    return count
+
+def ingest_files(conn, paths, context=None):
+    """Merge snapshot files into the index in one streaming pass
+
+    Arguments:
+    conn -- Connection from open_index
+    paths {list} -- JSON or JSON Lines files produced by the scraper
+    context {dict} -- Crawl context overriding what crawl_context() finds
+        for each file; None values are ignored
+
+    Returns:
+    list -- (path, number of records ingested) pairs in the order of paths;
+        the number is None if the file was already ingested
+    """
+    results = []
+    for path in paths:
+        file_context = crawl_context(path)
+        file_context.update({key: value for key, value in (context or {}).items() if value is not None})
+        count = ingest_records(conn, iter_records(path), path, _snapshot_version(path), file_context)
+        results.append((path, count))
+    return results
+
+def iter_latest_hotels(conn, checkin=None, checkout=None, adults=None):
+    """Yield one record per entity and crawl context with the latest price facts
+
+    Within a context (checkin, checkout, adults) the facts of the most
+    recent crawl win, regardless of the order the snapshots were ingested.
+    Records have the same fields as the scraper output plus the context,
+    with 'id' set to the hotel's data-id when known and to the entity key
+    otherwise.
+
+    Arguments:
+    conn -- Connection from open_index
+    checkin, checkout, adults -- Only export this context (all if None)
+    """
+    filters = {'checkin': checkin, 'checkout': checkout, 'adults': adults}
+    conditions = [f's.{field} = :{field}' for field, value in filters.items() if value is not None]
+    query = f"""
+    WITH latest AS (
+        SELECT f.*, s.checkin, s.checkout, s.adults,
+               ROW_NUMBER() OVER (
+                   PARTITION BY f.entity_key, s.checkin, s.checkout, s.adults
+                   ORDER BY COALESCE(s.crawled_at, s.ingested_at) DESC, s.snapshot_id DESC
+               ) AS recency
+        FROM price_facts f
+        JOIN snapshots s ON s.snapshot_id = f.snapshot_id
+        {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+    )
+    SELECT e.entity_key, e.hotel_id, e.name, e.image_url, e.star_rating, e.location,
+           e.distance_to_center, e.features,
+           l.review_score, l.review_text, l.review_count, l.price, l.daily_price, l.nights,
+           l.checkin, l.checkout, l.adults
+    FROM entities e
+    JOIN latest l ON l.entity_key = e.entity_key AND l.recency = 1
+    ORDER BY e.entity_key, l.checkin, l.checkout, l.adults
+    """
+    for row in conn.execute(query, filters):
+        entity_key, hotel_id, *static, features = row[:8]
+        hotel = {'id': hotel_id or entity_key}
+        hotel.update(zip(STATIC_FIELDS[:-1], static))
+        hotel['features'] = json.loads(features) if features else []
+        hotel.update(zip(FACT_FIELDS + CONTEXT_FIELDS, row[8:]))
+        yield hotel
+
+def index_stats(conn):
+    """Return entity, snapshot and price fact counts"""
+    return {
+        'entities': conn.execute('SELECT COUNT(*) FROM entities').fetchone()[0],
+        'snapshots': conn.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0],
+        'price_facts': conn.execute('SELECT COUNT(*) FROM price_facts').fetchone()[0],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicate hotel snapshots into an entity index")
+    parser.add_argument('--db', default=DEFAULT_INDEX_PATH, help="Entity index database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help="Merge snapshot files into the index")
+    ingest_parser.add_argument('paths', nargs='+', help="hotels_data.json files from one or more crawls")
+    ingest_parser.add_argument('--crawled-at', help="Crawl time (ISO format, defaults to the file time)")
+
+    export_parser = subparsers.add_parser('export', help="Write the latest record per hotel and context to JSON")
+    export_parser.add_argument('-o', '--output', default='hotels_latest.json')
+
+    # Read from distributed_crawl result names when not given
+    for context_parser in (ingest_parser, export_parser):
+        context_parser.add_argument('--checkin', help="Check-in date (YYYYMMDD)")
+        context_parser.add_argument('--checkout', help="Check-out date (YYYYMMDD)")
+        context_parser.add_argument('--adults', type=int, help="Number of adults")
+
+    subparsers.add_parser('stats', help="Print index counts")
+
+    args = parser.parse_args()
+    conn = open_index(args.db)
+    try:
+        if args.command == 'ingest':
+            context = {'checkin': args.checkin, 'checkout': args.checkout,
+                       'adults': args.adults, 'crawled_at': args.crawled_at}
+            for path, count in ingest_files(conn, args.paths, context):
+                if count is None:
+                    print(f"Skipped {path} (already ingested)")
+                else:
+                    print(f"Ingested {count} records from {path}")
+        elif args.command == 'export':
+            with open(args.output, 'w', encoding='utf-8') as f:
+                hotels = iter_latest_hotels(conn, args.checkin, args.checkout, args.adults)
+                json.dump(list(hotels), f, ensure_ascii=False, indent=4)
+            print(f"Data saved to {args.output}")
+
+        stats = index_stats(conn)
+        print(f"{stats['entities']} hotels, {stats['snapshots']} snapshots, {stats['price_facts']} price facts")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import io
+import csv
+import gzip
+
+# Column order of hotel records, as produced by main.extract_hotel_data
+HOTEL_COLUMNS = (
+    'id', 'name', 'image_url', 'star_rating', 'location', 'distance_to_center',
+    'features', 'review_score', 'review_text', 'review_count', 'price',
+    'daily_price', 'nights',
+)
+
+# Separator used when writing list fields (e.g. features) to a single cell
+LIST_SEPARATOR = ', '
+
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+
+def infer_compression(path):
+    """Return the compression implied by a file name ("gzip", "zstd" or None)"""
+    for suffix, compression in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+def open_text_output(path, compression=None):
+    """Open a text file for writing, optionally compressed
+
+    Arguments:
+    path {str} -- Output path
+    compression {str} -- None, "gzip" or "zstd"; inferred from the suffix if None
+
+    Returns:
+    file object -- Text stream to write to; close it to finish the file
+    """
+    compression = compression or infer_compression(path)
+    if compression is None:
+        return open(path, 'w', newline='', encoding='utf-8')
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', newline='', encoding='utf-8')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd compression requires the zstandard package: pip install zstandard")
+        raw = open(path, 'wb')
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw), newline='', encoding='utf-8')
+    raise ValueError(f"Unknown compression: {compression} (expected gzip or zstd)")
+
+def iter_cells(records, columns):
+    """Yield one list of cell values per record, in column order
+
+    List values are joined with LIST_SEPARATOR. Records are only read, never
+    modified, and no copies of them are made.
+    """
+    for record in records:
+        yield [
+            LIST_SEPARATOR.join(value) if isinstance(value, list) else value
+            for value in map(record.get, columns)
+        ]
+
+def write_csv(records, path, columns=HOTEL_COLUMNS, compression=None):
+    """Write records to a CSV file in a single pass
+
+    The header is the fixed column order given, so every run produces the
+    same layout; keys not in columns are not written. records may be any
+    iterable, including a generator.
+
+    Arguments:
+    records -- Iterable of dictionaries
+    path {str} -- Output path (".gz" / ".zst" enable compression)
+    columns {tuple} -- Column order
+    compression {str} -- None, "gzip" or "zstd"
+
+    Returns:
+    int -- Number of records written
+    """
+    count = 0
+    with open_text_output(path, compression) as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in iter_cells(records, columns):
+            writer.writerow(row)
+            count += 1
+    return count
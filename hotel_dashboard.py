@@ -1,55 +1,79 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import json
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import re
+import os
 
-# Function to extract numeric values from price strings
-def extract_numeric_value(price_str):
-    if not price_str or not isinstance(price_str, str):
-        return None
-    
-    matches = re.findall(r'[\d.,]+', price_str)
-    if not matches:
-        return None
-    
-    price_text = matches[0]
-    price_text = price_text.replace('.', '').replace(',', '.')
-    
-    try:
-        return float(price_text)
-    except ValueError:
-        return None
+import scoring
+import image_cache
 
-# Load and process data
-def load_and_process_data(json_file, top_n=10):
-    # Load data
+# pandas and Plotly are imported inside the chart functions that use them,
+# so the page starts rendering before the plotting stack is loaded
+
+# Data files in order of preference: the full crawl is re-ranked with the
+# sidebar weights, the pre-computed top list is the fallback
+DATA_FILES = ('hotels_data.json', 'top_value_hotels.json')
+
+# Sidebar label -> scorer name in scoring.SCORERS
+SCORER_LABELS = {
+    'Value ratio (score per 1000 TL)': 'value_ratio',
+    'Review score': 'review_score',
+    'Review count confidence': 'review_confidence',
+    'Star rating': 'stars',
+    'Proximity to center': 'proximity',
+    'Nights': 'nights',
+    'Feature bonuses': 'features',
+}
+
+# Parse a data file once per version; shared across sessions and reruns.
+# Only the current and the previous version are kept in memory
+@st.cache_resource(show_spinner="Loading hotel data...", max_entries=2)
+def load_hotel_frame(json_file, version):
     with open(json_file, 'r', encoding='utf-8') as f:
         hotels = json.load(f)
+    return scoring.prepare_frame(hotels)
+
+# Sorted feature names offered for bonuses, computed once per version
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_feature_list(json_file, version):
+    frame = load_hotel_frame(json_file, version)
+    return sorted(frame['features'].explode().dropna().unique())
+
+# Thumbnails are read from the local image cache only; run image_cache.py
+# after a crawl to fill it. Re-read whenever the cache index changes.
+@st.cache_data(show_spinner=False)
+def load_thumbnails(image_urls, index_mtime):
+    index = image_cache.load_index()
+    thumbnails = {}
+    for url in image_urls:
+        path = image_cache.thumbnail_path(url, index)
+        if path:
+            thumbnails[url] = image_cache.thumbnail_data_uri(path)
+    return thumbnails
+
+def add_thumbnails(df):
+    index_file = os.path.join(image_cache.DEFAULT_CACHE_DIR, image_cache.INDEX_FILE)
+    if 'image_url' not in df.columns or not os.path.exists(index_file):
+        df['thumbnail'] = None
+        return df
+    image_urls = tuple(url for url in df['image_url'] if url)
+    thumbnails = load_thumbnails(image_urls, os.path.getmtime(index_file))
+    df['thumbnail'] = df['image_url'].map(thumbnails)
+    return df
+
+# Load and process data
+def load_and_process_data(json_file, top_n=10, weights=None, feature_bonuses=None):
+    version = scoring.dataset_version(json_file)
+    frame = load_hotel_frame(json_file, version)
     
-    # Convert to DataFrame
-    df = pd.DataFrame(hotels)
-    
-    # Process numeric fields
-    df['numeric_price'] = df['price'].apply(extract_numeric_value)
-    df['numeric_daily_price'] = df['daily_price'].apply(extract_numeric_value)
-    df['numeric_review_score'] = pd.to_numeric(df['review_score'], errors='coerce')
-    df['numeric_review_count'] = pd.to_numeric(df['review_count'], errors='coerce')
-    
-    # Sort by value_ratio
-    df = df.sort_values('value_ratio', ascending=False)
-    
-    # Get top N or all hotels if there are fewer than top_n
-    available_hotels = min(top_n, len(df))
-    df = df.head(available_hotels)
+    # Rank with the scoring engine; results are cached per (version, weights)
+    df = scoring.rank_hotels(frame, weights, feature_bonuses, top_n, version)
+    df['value_ratio'] = df['value_score']
     
-    return df
+    return add_thumbnails(df)
 
 # Create value overview visualizations
 def create_value_overview(df):
+    import plotly.express as px
+    
     # Value ratio bar chart
     fig_value = px.bar(
         df, 
@@ -83,6 +107,8 @@ def create_value_overview(df):
 
 # Create price analysis visualizations
 def create_price_analysis(df):
+    import plotly.express as px
+    
     # Price distribution
     fig_price_dist = px.histogram(
         df, 
@@ -109,6 +135,8 @@ def create_price_analysis(df):
 
 # Create review analysis visualizations
 def create_review_analysis(df):
+    import plotly.express as px
+    
     # Review score distribution
     fig_score_dist = px.histogram(
         df, 
@@ -135,6 +163,10 @@ def create_review_analysis(df):
 
 # Create feature analysis visualizations
 def create_feature_analysis(df):
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
     # Process features
     all_features = []
     feature_counts = {}
@@ -242,6 +274,8 @@ def create_feature_analysis(df):
 
 # Create location analysis visualizations
 def create_location_analysis(df):
+    import plotly.express as px
+    
     # Location distribution
     location_counts = df['location'].value_counts().reset_index()
     location_counts.columns = ['location', 'count']
@@ -256,20 +290,8 @@ def create_location_analysis(df):
     )
     
     # Distance to center analysis
-    # Filter out rows with missing distance_to_center
-    distance_df = df[df['distance_to_center'].notna()].copy()
-    
-    # Extract numeric distance values
-    def extract_distance(distance_str):
-        if not distance_str or not isinstance(distance_str, str):
-            return None
-        
-        match = re.search(r'(\d+\.?\d*)', distance_str)
-        if match:
-            return float(match.group(1))
-        return None
-    
-    distance_df['numeric_distance'] = distance_df['distance_to_center'].apply(extract_distance)
+    # Filter out rows without a parsed distance (see scoring.prepare_frame)
+    distance_df = df[df['numeric_distance'].notna()]
     
     # Create scatter plot of distance vs price
     fig_distance = px.scatter(
@@ -306,8 +328,27 @@ def main():
     st.sidebar.header("Dashboard Controls")
     top_n = st.sidebar.slider("Number of Top Hotels", 5, 100, 10, 5)
     
+    data_file = next((path for path in DATA_FILES if os.path.exists(path)), None)
+    if data_file is None:
+        st.error(f"No hotel data found. Expected one of: {', '.join(DATA_FILES)}")
+        return
+    
+    # Scoring weights; the defaults rank by review score per 1000 TL
+    with st.sidebar.expander("Scoring Weights"):
+        weights = {}
+        for label, name in SCORER_LABELS.items():
+            default = scoring.DEFAULT_WEIGHTS.get(name, 0.0)
+            weights[name] = st.slider(label, 0.0, 5.0, float(default), 0.1)
+        all_features = load_feature_list(data_file, scoring.dataset_version(data_file))
+        bonus_features = st.multiselect("Features earning a bonus", all_features)
+    feature_bonuses = {feature: 1.0 for feature in bonus_features}
+    
+    if not any(weights.values()) and not feature_bonuses:
+        st.warning("Set at least one scoring weight above zero or pick bonus features.")
+        return
+    
     # Load data
-    df = load_and_process_data('top_value_hotels.json', top_n)
+    df = load_and_process_data(data_file, top_n, weights, feature_bonuses)
     
     # Display summary metrics
     st.sidebar.subheader("Summary Statistics")
@@ -341,7 +382,8 @@ def main():
         # Display top hotels table
         st.subheader(f"Top {top_n} Hotels by Value Ratio")
         st.dataframe(
-            df[['name', 'value_ratio', 'price', 'review_score', 'star_rating', 'location']]
+            df[['thumbnail', 'name', 'value_ratio', 'price', 'review_score', 'star_rating', 'location']],
+            column_config={'thumbnail': st.column_config.ImageColumn("Image", width="small")}
         )
     
     # Tab 2: Price Analysis
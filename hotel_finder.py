@@ -0,0 +1,95 @@
+"""Command line entry point for every pipeline stage.
+
+    python hotel_finder.py scrape [--profile production]
+    python hotel_finder.py distributed {coordinator,worker,status} [options]
+    python hotel_finder.py analyze [--incremental]
+    python hotel_finder.py dashboard [streamlit options]
+    python hotel_finder.py bench {startup,browser} [benchmark options]
+
+Each stage's module is imported only when its subcommand runs, so running
+one stage never pays for the imports of the others.
+"""
+import os
+import sys
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARKS = {
+    'startup': os.path.join(ROOT_DIR, 'benchmarks', 'startup.py'),
+    'browser': os.path.join(ROOT_DIR, 'benchmarks', 'browser_profiles.py'),
+}
+
+def run_scrape(args):
+    import time
+    import main
+
+    start_time = time.time()
+    main.main(args.profile)
+    print(f"Script finished in {time.time() - start_time:.2f} seconds")
+
+def run_distributed(args):
+    import distributed_crawl
+
+    sys.argv = ['distributed_crawl.py', args.role] + args.distributed_args
+    distributed_crawl.main_cli()
+
+def run_analyze(args):
+    import value_analysis
+
+    value_analysis.main(args.incremental, args.state)
+
+def run_dashboard(args):
+    from streamlit.web import cli as streamlit_cli
+
+    sys.argv = ['streamlit', 'run', os.path.join(ROOT_DIR, 'hotel_dashboard.py')] + args.streamlit_args
+    sys.exit(streamlit_cli.main())
+
+def run_bench(args):
+    import runpy
+
+    sys.argv = [BENCHMARKS[args.benchmark]] + args.bench_args
+    runpy.run_path(BENCHMARKS[args.benchmark], run_name='__main__')
+
+def build_parser():
+    """Build the argument parser; no stage module is imported here"""
+    parser = argparse.ArgumentParser(prog='hotel_finder', description="Hotel finder pipeline")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape = subparsers.add_parser('scrape', help="Scrape hotel listings (main.py)")
+    scrape.add_argument('--profile', choices=('interactive', 'production'), default='interactive',
+                        help="Browser profile: interactive (visible browser) or production (headless)")
+    scrape.set_defaults(handler=run_scrape)
+
+    distributed = subparsers.add_parser('distributed',
+                                        help="Crawl many cities/dates with worker processes (distributed_crawl.py)")
+    distributed.add_argument('role', choices=('coordinator', 'worker', 'status'))
+    distributed.add_argument('distributed_args', nargs=argparse.REMAINDER,
+                             help="Arguments passed to distributed_crawl.py")
+    distributed.set_defaults(handler=run_distributed)
+
+    analyze = subparsers.add_parser('analyze', help="Rank hotels by value (value_analysis.py)")
+    analyze.add_argument('--incremental', action='store_true',
+                         help="Re-score only hotels that changed since the last run")
+    analyze.add_argument('--state', default='value_analysis_state.json',
+                         help="State file used by --incremental")
+    analyze.set_defaults(handler=run_analyze)
+
+    dashboard = subparsers.add_parser('dashboard', help="Launch the Streamlit dashboard")
+    dashboard.add_argument('streamlit_args', nargs=argparse.REMAINDER,
+                           help="Extra arguments passed to 'streamlit run'")
+    dashboard.set_defaults(handler=run_dashboard)
+
+    bench = subparsers.add_parser('bench', help="Run a benchmark")
+    bench.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    bench.add_argument('bench_args', nargs=argparse.REMAINDER, help="Arguments passed to the benchmark")
+    bench.set_defaults(handler=run_bench)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import io
+import os
+import json
+import time
+import base64
+import hashlib
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+# requests and Pillow are imported on first use by _load_http(); the
+# dashboard only reads the cache and never needs them
+requests = HTTPAdapter = Image = None
+
+def _load_http():
+    global requests, HTTPAdapter, Image
+    if requests is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from PIL import Image
+
+DEFAULT_CACHE_DIR = '.image_cache'
+
+# Bounding box of the stored thumbnails, in pixels
+THUMBNAIL_SIZE = (160, 120)
+THUMBNAIL_QUALITY = 80
+
+# Concurrent downloads in total and per host
+MAX_WORKERS = 8
+PER_HOST_LIMIT = 4
+
+# Cached images younger than this are used without revalidating them
+MAX_AGE_SECONDS = 24 * 60 * 60
+
+REQUEST_TIMEOUT = 15
+
+INDEX_FILE = 'index.json'
+
+# Completed downloads between index saves, so an interrupted run keeps its progress
+INDEX_SAVE_INTERVAL = 100
+
+def load_index(cache_dir=DEFAULT_CACHE_DIR):
+    """Load the URL index of an image cache
+
+    Returns:
+    dict -- image URL -> {'hash', 'etag', 'last_modified', 'checked_at'}
+    """
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_index(index, cache_dir=DEFAULT_CACHE_DIR):
+    """Write the URL index atomically so readers never see a partial file"""
+    path = os.path.join(cache_dir, INDEX_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def content_path(content_hash, cache_dir=DEFAULT_CACHE_DIR):
+    """Return the thumbnail path for a content hash"""
+    return os.path.join(cache_dir, content_hash[:2], f"{content_hash}.jpg")
+
+def thumbnail_path(url, index, cache_dir=DEFAULT_CACHE_DIR):
+    """Return the cached thumbnail for an image URL, or None if not cached
+
+    Only the local cache is consulted; nothing is downloaded.
+    """
+    entry = index.get(url) if url else None
+    if not entry:
+        return None
+    path = content_path(entry['hash'], cache_dir)
+    return path if os.path.exists(path) else None
+
+def thumbnail_data_uri(path):
+    """Return a thumbnail file as a data URI for embedding in HTML tables"""
+    with open(path, 'rb') as f:
+        return 'data:image/jpeg;base64,' + base64.b64encode(f.read()).decode('ascii')
+
+def make_thumbnail(data):
+    """Resize image bytes to a JPEG thumbnail
+
+    Arguments:
+    data {bytes} -- Original image in any format Pillow can read
+
+    Returns:
+    bytes -- JPEG thumbnail fitting in THUMBNAIL_SIZE
+    """
+    _load_http()
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGB')
+        image.thumbnail(THUMBNAIL_SIZE)
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+    return output.getvalue()
+
+def create_session(max_workers=MAX_WORKERS):
+    """Create an HTTP session whose connection pool fits all workers"""
+    _load_http()
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class _HostLimiter:
+    """Per-host semaphores limiting concurrent requests to one server"""
+
+    def __init__(self, limit):
+        self.lock = threading.Lock()
+        self.semaphores = defaultdict(lambda: threading.BoundedSemaphore(limit))
+
+    def __call__(self, url):
+        with self.lock:
+            return self.semaphores[urlsplit(url).netloc]
+
+def _fetch_one(session, limiter, url, entry, cache_dir):
+    """Download or revalidate one image
+
+    Returns:
+    tuple: (str, dict or None) -- Outcome ('fetched', 'not_modified' or
+        'failed') and the new index entry
+    """
+    # Revalidate only if the thumbnail is still on disk; otherwise a 304
+    # would keep pointing the URL at a missing file
+    if entry and not os.path.exists(content_path(entry['hash'], cache_dir)):
+        entry = None
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    try:
+        with limiter(url):
+            response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException:
+        return 'failed', entry
+
+    now = time.time()
+    if response.status_code == 304 and entry:
+        return 'not_modified', dict(entry, checked_at=now)
+    if response.status_code != 200:
+        return 'failed', entry
+
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    path = content_path(content_hash, cache_dir)
+    if not os.path.exists(path):
+        try:
+            thumbnail = make_thumbnail(response.content)
+        except (OSError, Image.DecompressionBombError):
+            return 'failed', entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(thumbnail)
+        os.replace(tmp_path, path)
+
+    return 'fetched', {
+        'hash': content_hash,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'checked_at': now,
+    }
+
+def fetch_thumbnails(urls, cache_dir=DEFAULT_CACHE_DIR, max_workers=MAX_WORKERS,
+                     per_host=PER_HOST_LIMIT, max_age=MAX_AGE_SECONDS, session=None):
+    """Download, resize and cache thumbnails for image URLs
+
+    Images cached within max_age are skipped. Older ones are revalidated with
+    If-None-Match / If-Modified-Since and only re-downloaded if they changed.
+    Identical images served from different URLs share one thumbnail file.
+
+    Arguments:
+    urls -- Iterable of image URLs (duplicates and None are ignored)
+    cache_dir {str} -- Cache directory
+    max_workers {int} -- Concurrent downloads in total
+    per_host {int} -- Concurrent downloads per host
+    max_age {float} -- Seconds before a cached image is revalidated
+    session -- requests.Session to use (one with a matching pool is created if omitted)
+
+    Returns:
+    dict -- Counts of 'fresh', 'fetched', 'not_modified' and 'failed' images
+    """
+    _load_http()
+    os.makedirs(cache_dir, exist_ok=True)
+    index = load_index(cache_dir)
+    session = session or create_session(max_workers)
+    limiter = _HostLimiter(per_host)
+    stats = {'fresh': 0, 'fetched': 0, 'not_modified': 0, 'failed': 0}
+
+    now = time.time()
+    pending = []
+    for url in dict.fromkeys(u for u in urls if u):
+        entry = index.get(url)
+        if entry and now - entry.get('checked_at', 0) < max_age and thumbnail_path(url, index, cache_dir):
+            stats['fresh'] += 1
+        else:
+            pending.append(url)
+
+    # Only this thread touches the index; workers return their entries
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_fetch_one, session, limiter, url, index.get(url), cache_dir): url
+                for url in pending
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    outcome, entry = future.result()
+                except Exception:
+                    # e.g. a full disk; the previous index entry is kept
+                    outcome, entry = 'failed', None
+                stats[outcome] += 1
+                if entry:
+                    index[futures[future]] = entry
+                if done % INDEX_SAVE_INTERVAL == 0:
+                    save_index(index, cache_dir)
+    finally:
+        save_index(index, cache_dir)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache hotel image thumbnails")
+    parser.add_argument('input', nargs='?', default='hotels_data.json', help="Hotel data JSON file")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    parser.add_argument('--per-host', type=int, default=PER_HOST_LIMIT)
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        hotels = json.load(f)
+
+    start_time = time.time()
+    stats = fetch_thumbnails((hotel.get('image_url') for hotel in hotels), args.cache_dir,
+                             args.workers, args.per_host)
+    print(f"Thumbnails: {stats['fetched']} fetched, {stats['not_modified']} not modified, "
+          f"{stats['fresh']} fresh, {stats['failed']} failed "
+          f"in {time.time() - start_time:.2f} seconds")
+
+if __name__ == "__main__":
+    main()
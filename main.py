@@ -1,12 +1,29 @@
+import os
 import time
 import json
-import csv
+import re
+import argparse
 from datetime import datetime, timedelta
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
+from urllib.parse import urlsplit
+
+import rate_control
+from exporters import HOTEL_COLUMNS, write_csv
+
+# Selenium is imported on first use by _load_selenium(), so that tools which
+# only need the URL or export helpers of this module start quickly
+webdriver = By = WebDriverWait = EC = None
+TimeoutException = StaleElementReferenceException = NoSuchElementException = None
+
+def _load_selenium():
+    global webdriver, By, WebDriverWait, EC
+    global TimeoutException, StaleElementReferenceException, NoSuchElementException
+    if webdriver is not None:
+        return
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
 
 def find_next_weekend() -> tuple:
     """Returns the next weekend dates (friday and sunday)
@@ -24,132 +41,179 @@ def get_hotel_url(city_code: str, checkin: str, checkout: str, adults: int) -> s
     https://www.obilet.com/oteller/istanbul-250-60649-2/20250319-20250323/2ad
 
     Arguments:
-    city_code {str} -- City code for the search
+    city_code {str} -- Full city code as it appears in obilet.com search URLs, e.g. "istanbul-250-60649-2"
     checkin {str} -- Check-in date in "YYYYMMDD" format
     checkout {str} -- Check-out date in "YYYYMMDD" format
     adults {int} -- Number of adults
     """
-    return f"https://www.obilet.com/oteller/{city_code}-250-60649-2/{checkin}-{checkout}/{adults}ad"
+    return f"https://www.obilet.com/oteller/{city_code}/{checkin}-{checkout}/{adults}ad"
+
+# Maximum number of times a single field is re-read after its element went stale
+MAX_FIELD_RETRIES = 3
+
+# Maximum number of end-of-crawl passes over hotels that still failed extraction
+MAX_DEAD_LETTER_PASSES = 2
+
+HOTEL_ITEM_SELECTOR = 'li.item.journey.js-hotel-item'
+
+# Hotel whose presence signals that the Istanbul listing has loaded
+TARGET_HOTEL_SELECTOR = f'{HOTEL_ITEM_SELECTOR}[data-id="101336"][data-name="Swissôtel The Bosphorus İstanbul"]'
+
+# Seconds to wait for the listing to load, and attempts before giving up
+READY_TIMEOUT = 30
+MAX_NAVIGATION_ATTEMPTS = 3
+
+# Seconds to wait for more hotels after a scroll, and scrolls without new
+# hotels before the listing is considered complete (about 60 seconds of
+# waiting, as with the former 30 scrolls of 2 seconds)
+SCROLL_CONTENT_TIMEOUT = 2 * rate_control.TARGET_LATENCY
+MAX_IDLE_SCROLLS = 10
+
+# Browser profiles: "interactive" opens a visible browser for development,
+# "production" runs headless with images and heavy resources disabled
+BROWSER_PROFILES = ('interactive', 'production')
+DEFAULT_BROWSER_PROFILE = 'interactive'
+
+# Small viewport for headless runs; listings render the same at this width
+PRODUCTION_WINDOW_SIZE = "1280,900"
+
+# Disk cache shared by production runs so static assets are not re-downloaded
+BROWSER_CACHE_DIR = os.environ.get(
+    'HOTEL_FINDER_BROWSER_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'hotel-finder', 'chrome')
+)
+
+# Resources the scraper never reads; blocked in the production profile
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp4', '*.webm', '*.mp3',
+]
+
+def new_extraction_stats() -> dict:
+    """Returns an empty counter dictionary for extraction accounting
+
+    Returns:
+    dict -- Counters updated by extract_hotel_data and the crawl loop
+    """
+    return {
+        'extracted': 0,
+        'field_retries': 0,
+        'element_relookups': 0,
+        'stale_skipped': 0,
+        'dead_lettered': 0,
+        'recovered': 0,
+        'failed': 0,
+        'navigation_retries': 0,
+        'request_rate': None,
+        'error': None,
+    }
+
+def find_hotel_element(driver, hotel_id):
+    """Re-locate a hotel element on the page by its data-id
+
+    Arguments:
+    driver -- Selenium WebDriver instance
+    hotel_id {str} -- Value of the hotel's data-id attribute
+
+    Returns:
+    WebElement or None -- Fresh hotel element, or None if it is not in the DOM
+    """
+    _load_selenium()
+    elements = driver.find_elements(By.CSS_SELECTOR, f'{HOTEL_ITEM_SELECTOR}[data-id="{hotel_id}"]')
+    return elements[0] if elements else None
 
-def extract_hotel_data(hotel_element):
+def _text_or_none(hotel_element, selector):
+    try:
+        return hotel_element.find_element(By.CSS_SELECTOR, selector).text.strip()
+    except NoSuchElementException:
+        return None
+
+def _extract_image_url(hotel_element):
+    try:
+        return hotel_element.find_element(By.CSS_SELECTOR, '.hotel-item__image').get_attribute('src')
+    except NoSuchElementException:
+        return None
+
+def _extract_star_rating(hotel_element):
+    return len(hotel_element.find_elements(By.CSS_SELECTOR, '.hotel-item__star .star'))
+
+def _extract_features(hotel_element):
+    return [feature.text.strip() for feature in hotel_element.find_elements(By.CSS_SELECTOR, '.hotel-features__item span')]
+
+def _extract_review_count(hotel_element):
+    review_count = _text_or_none(hotel_element, '.hotel-review__comment')
+    if review_count is None:
+        return None
+    # Extract just the number from the parentheses
+    review_count_match = re.search(r'\((\d+)', review_count)
+    if review_count_match:
+        return review_count_match.group(1)
+    return review_count
+
+# Field name -> function reading that field from a hotel element.
+# Each function must only touch the element it is given so that it can be
+# re-run against a freshly looked-up element when the old one goes stale.
+FIELD_EXTRACTORS = {
+    'name': lambda el: el.get_attribute('data-name'),
+    'image_url': _extract_image_url,
+    'star_rating': _extract_star_rating,
+    'location': lambda el: _text_or_none(el, '.hotel-location__address'),
+    'distance_to_center': lambda el: _text_or_none(el, '.hotel-location__city-center-distance'),
+    'features': _extract_features,
+    'review_score': lambda el: _text_or_none(el, '.hotel-review__badge'),
+    'review_text': lambda el: _text_or_none(el, '.hotel-review__text'),
+    'review_count': _extract_review_count,
+    'price': lambda el: _text_or_none(el, '.hotel-price__amount'),
+    'daily_price': lambda el: _text_or_none(el, '.hotel-price__daily-amount'),
+    'nights': lambda el: _text_or_none(el, '.hotel-price__night'),
+}
+
+def extract_hotel_data(hotel_element, driver=None, hotel_id=None, max_retries=MAX_FIELD_RETRIES, stats=None):
     """Extract data from a hotel element
-    
+
+    Every field is read independently. When a read hits a stale element and a
+    driver is given, the hotel element is looked up again by its data-id and
+    only that field is retried, up to max_retries times.
+
     Arguments:
     hotel_element -- Selenium WebElement representing a hotel
-    
+    driver -- Selenium WebDriver used to re-locate stale elements (optional)
+    hotel_id {str} -- data-id of the hotel, read from the element if omitted
+    max_retries {int} -- Retry budget per field
+    stats {dict} -- Counters from new_extraction_stats() to update (optional)
+
     Returns:
-    dict -- Dictionary containing hotel data
+    dict -- Dictionary containing hotel data, or None if a field could not be read
     """
+    _load_selenium()
+    if stats is None:
+        stats = new_extraction_stats()
+
     try:
-        # Extract hotel ID
-        hotel_id = hotel_element.get_attribute('data-id')
-        
-        # Extract hotel name
-        hotel_name = hotel_element.get_attribute('data-name')
-        
-        # Extract hotel image URL
-        try:
-            image_element = hotel_element.find_element(By.CSS_SELECTOR, '.hotel-item__image')
-            image_url = image_element.get_attribute('src')
-        except NoSuchElementException:
-            image_url = None
-        
-        # Extract star rating
-        try:
-            star_elements = hotel_element.find_elements(By.CSS_SELECTOR, '.hotel-item__star .star')
-            star_rating = len(star_elements)
-        except NoSuchElementException:
-            star_rating = None
-        
-        # Extract location
-        try:
-            location_element = hotel_element.find_element(By.CSS_SELECTOR, '.hotel-location__address')
-            location = location_element.text.strip()
-        except NoSuchElementException:
-            location = None
-        
-        # Extract distance to center
-        try:
-            distance_element = hotel_element.find_element(By.CSS_SELECTOR, '.hotel-location__city-center-distance')
-            distance = distance_element.text.strip()
-        except NoSuchElementException:
-            distance = None
-        
-        # Extract features
-        features = []
-        try:
-            feature_elements = hotel_element.find_elements(By.CSS_SELECTOR, '.hotel-features__item span')
-            for feature in feature_elements:
-                features.append(feature.text.strip())
-        except NoSuchElementException:
-            pass
-        
-        # Extract review score
-        try:
-            review_score_element = hotel_element.find_element(By.CSS_SELECTOR, '.hotel-review__badge')
-            review_score = review_score_element.text.strip()
-        except NoSuchElementException:
-            review_score = None
-        
-        # Extract review text
-        try:
-            review_text_element = hotel_element.find_element(By.CSS_SELECTOR, '.hotel-review__text')
-            review_text = review_text_element.text.strip()
-        except NoSuchElementException:
-            review_text = None
-        
-        # Extract review count
-        try:
-            review_count_element = hotel_element.find_element(By.CSS_SELECTOR, '.hotel-review__comment')
-            review_count = review_count_element.text.strip()
-            # Extract just the number from the parentheses
-            import re
-            review_count_match = re.search(r'\((\d+)', review_count)
-            if review_count_match:
-                review_count = review_count_match.group(1)
-        except (NoSuchElementException, AttributeError):
-            review_count = None
-        
-        # Extract price
-        try:
-            price_element = hotel_element.find_element(By.CSS_SELECTOR, '.hotel-price__amount')
-            price = price_element.text.strip()
-        except NoSuchElementException:
-            price = None
-        
-        # Extract daily price
-        try:
-            daily_price_element = hotel_element.find_element(By.CSS_SELECTOR, '.hotel-price__daily-amount')
-            daily_price = daily_price_element.text.strip()
-        except NoSuchElementException:
-            daily_price = None
-        
-        # Extract nights
-        try:
-            nights_element = hotel_element.find_element(By.CSS_SELECTOR, '.hotel-price__night')
-            nights = nights_element.text.strip()
-        except NoSuchElementException:
-            nights = None
-        
-        return {
-            'id': hotel_id,
-            'name': hotel_name,
-            'image_url': image_url,
-            'star_rating': star_rating,
-            'location': location,
-            'distance_to_center': distance,
-            'features': features,
-            'review_score': review_score,
-            'review_text': review_text,
-            'review_count': review_count,
-            'price': price,
-            'daily_price': daily_price,
-            'nights': nights
-        }
+        if hotel_id is None:
+            hotel_id = hotel_element.get_attribute('data-id')
     except StaleElementReferenceException:
-        # If the element becomes stale, return None
+        # Without the id there is no way to find the element again
         return None
 
+    hotel_data = {'id': hotel_id}
+    for field, extractor in FIELD_EXTRACTORS.items():
+        for attempt in range(max_retries + 1):
+            try:
+                hotel_data[field] = extractor(hotel_element)
+                break
+            except StaleElementReferenceException:
+                if driver is None or attempt == max_retries:
+                    return None
+                stats['field_retries'] += 1
+                hotel_element = find_hotel_element(driver, hotel_id)
+                stats['element_relookups'] += 1
+                if hotel_element is None:
+                    return None
+
+    return hotel_data
+
 def save_to_json(data, filename):
     """Save data to a JSON file
     
@@ -161,88 +225,270 @@ def save_to_json(data, filename):
         json.dump(data, f, ensure_ascii=False, indent=4)
     print(f"Data saved to {filename}")
 
-def save_to_csv(data, filename):
+def save_to_csv(data, filename, compression=None):
     """Save data to a CSV file
     
+    Columns follow HOTEL_COLUMNS. The records in data are not modified.
+    
     Arguments:
     data -- List of dictionaries containing hotel data
-    filename -- Name of the file to save to
+    filename -- Name of the file to save to (".gz" / ".zst" for compression)
+    compression -- None, "gzip" or "zstd" (inferred from filename if None)
     """
     if not data:
         print("No data to save to CSV")
         return
     
-    # Get all possible keys from all dictionaries
-    fieldnames = set()
-    for item in data:
-        fieldnames.update(item.keys())
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for item in data:
-            # Handle features list for CSV
-            if 'features' in item and isinstance(item['features'], list):
-                item['features'] = ', '.join(item['features'])
-            writer.writerow(item)
+    write_csv(data, filename, HOTEL_COLUMNS, compression)
     print(f"Data saved to {filename}")
 
-def main():
-    # Options for the hotel search
-    CITY_CODE = "istanbul-250-60649-2"
-    CHECKIN, CHECKOUT = find_next_weekend()
-    ADULTS = 2
-    
-    target_url = get_hotel_url(CITY_CODE, CHECKIN, CHECKOUT, ADULTS)
-    
-    # Initialize the WebDriver
+def retry_dead_letter(driver, dead_letter, all_hotels_data, processed_hotel_ids, stats, max_passes=MAX_DEAD_LETTER_PASSES):
+    """Re-queue hotels that failed extraction during the crawl
+
+    Each remaining hotel is looked up again by data-id, scrolled into view and
+    extracted with a fresh retry budget. Recovered hotels are appended to
+    all_hotels_data and removed from dead_letter.
+
+    Arguments:
+    driver -- Selenium WebDriver instance
+    dead_letter {dict} -- data-id -> number of failed extraction attempts
+    all_hotels_data {list} -- Extracted hotels, appended to in place
+    processed_hotel_ids {set} -- data-ids already extracted, updated in place
+    stats {dict} -- Counters from new_extraction_stats()
+    max_passes {int} -- Number of passes over the dead-letter list
+    """
+    _load_selenium()
+    for _ in range(max_passes):
+        if not dead_letter:
+            break
+        for hotel_id in list(dead_letter):
+            hotel_element = find_hotel_element(driver, hotel_id)
+            if hotel_element is None:
+                dead_letter[hotel_id] += 1
+                continue
+            try:
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", hotel_element)
+            except StaleElementReferenceException:
+                hotel_element = find_hotel_element(driver, hotel_id)
+                if hotel_element is None:
+                    dead_letter[hotel_id] += 1
+                    continue
+            hotel_data = extract_hotel_data(hotel_element, driver=driver, hotel_id=hotel_id, stats=stats)
+            if hotel_data:
+                all_hotels_data.append(hotel_data)
+                processed_hotel_ids.add(hotel_id)
+                del dead_letter[hotel_id]
+                stats['recovered'] += 1
+                stats['extracted'] += 1
+                print(f"Recovered hotel: {hotel_data['name']} (ID: {hotel_id})")
+            else:
+                dead_letter[hotel_id] += 1
+    stats['failed'] = len(dead_letter)
+
+def print_run_summary(stats, dead_letter):
+    """Print extraction and failure counts for a crawl
+
+    Arguments:
+    stats {dict} -- Counters from new_extraction_stats()
+    dead_letter {dict} -- data-id -> number of failed extraction attempts
+    """
+    print("\nRun summary:")
+    print("-" * 40)
+    print(f"{'Hotels extracted':<28}{stats['extracted']}")
+    print(f"{'Field retries':<28}{stats['field_retries']}")
+    print(f"{'Element re-lookups':<28}{stats['element_relookups']}")
+    print(f"{'Stale elements skipped':<28}{stats['stale_skipped']}")
+    print(f"{'Hotels dead-lettered':<28}{stats['dead_lettered']}")
+    print(f"{'Recovered from dead letter':<28}{stats['recovered']}")
+    print(f"{'Failed after all retries':<28}{stats['failed']}")
+    print(f"{'Navigation retries':<28}{stats['navigation_retries']}")
+    if stats['request_rate'] is not None:
+        print(f"{'Request rate (req/s)':<28}{stats['request_rate']:.2f}")
+    if stats['error']:
+        print(f"{'Crawl aborted by':<28}{stats['error']}")
+    print("-" * 40)
+    if dead_letter:
+        print(f"Failed hotel IDs: {', '.join(sorted(dead_letter))}")
+
+def build_chrome_options(profile=DEFAULT_BROWSER_PROFILE, cache_dir=None):
+    """Build Chrome options for one of the browser profiles
+
+    Arguments:
+    profile {str} -- "interactive" for a visible, maximized browser that stays
+        open after the run, or "production" for an unattended headless crawl
+    cache_dir {str} -- Disk cache directory shared across production runs
+
+    Returns:
+    ChromeOptions -- Options to pass to webdriver.Chrome
+    """
+    _load_selenium()
+    if profile not in BROWSER_PROFILES:
+        raise ValueError(f"Unknown browser profile: {profile} (expected one of {', '.join(BROWSER_PROFILES)})")
+
     options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized")  # Start with maximized browser
-    options.add_experimental_option("detach", True) # Keep the browser open after script ends
-    driver = webdriver.Chrome(options=options)
+    if profile == 'interactive':
+        options.add_argument("--start-maximized")  # Start with maximized browser
+        options.add_experimental_option("detach", True) # Keep the browser open after script ends
+        return options
+
+    cache_dir = cache_dir or BROWSER_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+
+    options.add_argument("--headless=new")
+    options.add_argument(f"--window-size={PRODUCTION_WINDOW_SIZE}")
+    options.add_argument(f"--disk-cache-dir={cache_dir}")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--mute-audio")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.notifications": 2,
+        "profile.managed_default_content_settings.geolocation": 2,
+    })
+    # Return control as soon as the DOM is ready; hotels are waited for explicitly
+    options.page_load_strategy = 'eager'
+    return options
+
+def create_driver(profile=DEFAULT_BROWSER_PROFILE, cache_dir=None):
+    """Start Chrome with the given browser profile
+
+    In the production profile, requests for images, fonts and media are
+    blocked at the network layer as well, since the scraper only reads text
+    and attributes from the page.
+
+    Arguments:
+    profile {str} -- Name of a browser profile from BROWSER_PROFILES
+    cache_dir {str} -- Disk cache directory shared across production runs
+
+    Returns:
+    WebDriver -- Running Chrome WebDriver
+    """
+    _load_selenium()
+    driver = webdriver.Chrome(options=build_chrome_options(profile, cache_dir))
+    if profile == 'production':
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    return driver
+
+def load_listing(driver, target_url, ready_selector, rate, stats, max_attempts=MAX_NAVIGATION_ATTEMPTS):
+    """Open target_url and wait for ready_selector, retrying on timeouts
+
+    Each timeout is reported to the rate controller, so the next attempt is
+    made at a lower request rate instead of giving up on the whole run.
+
+    Arguments:
+    driver -- Selenium WebDriver instance
+    target_url {str} -- Hotel search URL
+    ready_selector {str} -- Element whose presence means the listing loaded
+    rate {RateController} -- Pacing for the site's host
+    stats {dict} -- Counters from new_extraction_stats()
+    max_attempts {int} -- Attempts before the TimeoutException is raised
+    """
+    _load_selenium()
+    for attempt in range(1, max_attempts + 1):
+        rate.acquire()
+        start = time.time()
+        try:
+            driver.get(target_url)
+            WebDriverWait(driver, READY_TIMEOUT).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, ready_selector))
+            )
+        except TimeoutException:
+            rate.record(error=True)
+            if attempt == max_attempts:
+                raise
+            stats['navigation_retries'] += 1
+            print(f"Timed out loading the listing (attempt {attempt}/{max_attempts}), "
+                  f"retrying at {rate.rate:.2f} requests/s")
+            continue
+        rate.record(time.time() - start)
+        return
+
+def wait_for_more_hotels(driver, count, timeout=SCROLL_CONTENT_TIMEOUT):
+    """Wait until more than count hotels are listed
+
+    Returns:
+    bool -- True if new hotels appeared within timeout
+    """
+    _load_selenium()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+            lambda d: len(d.find_elements(By.CSS_SELECTOR, HOTEL_ITEM_SELECTOR)) > count
+        )
+        return True
+    except TimeoutException:
+        return False
+
+def crawl_hotels(driver, target_url, ready_selector=TARGET_HOTEL_SELECTOR, rate=None):
+    """Crawl every hotel listed at target_url
+
+    Errors stop the crawl but never discard it: whatever was extracted up to
+    that point is returned, and stats['error'] describes the error.
+
+    Arguments:
+    driver -- Selenium WebDriver instance
+    target_url {str} -- Hotel search URL from get_hotel_url
+    ready_selector {str} -- Element to wait for before extracting; use
+        HOTEL_ITEM_SELECTOR to wait for any hotel
+    rate {RateController} -- Request pacing shared with other crawls; a
+        private controller for the URL's host is used if omitted
+
+    Returns:
+    tuple: (list, dict, dict) -- Hotel data, extraction stats and the
+        dead-letter dictionary of hotels that still failed
+    """
+    _load_selenium()
+    # Initialize list to store all hotel data. These live outside the try block
+    # so that a partial crawl is still saved if something goes wrong midway.
+    all_hotels_data = []
+    processed_hotel_ids = set()
+    dead_letter = {}  # data-id -> failed extraction attempts
+    stats = new_extraction_stats()
+    own_rate = rate is None
+    if own_rate:
+        rate = rate_control.RateController(urlsplit(target_url).netloc)
     
     try:
-        # Navigate to the target URL
+        # Navigate to the target URL and wait for the target hotel element
         print(f"Navigating to {target_url}")
-        driver.get(target_url)
-        
-        # Wait for the specific hotel element to appear
-        print("Waiting for the target hotel element to appear...")
-        wait = WebDriverWait(driver, 30)
-        target_hotel = wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'li.item.journey.js-hotel-item[data-id="101336"][data-name="Swissôtel The Bosphorus İstanbul"]'))
-        )
+        load_listing(driver, target_url, ready_selector, rate, stats)
         print("Target hotel element found!")
         
-        # Initialize list to store all hotel data
-        all_hotels_data = []
-        processed_hotel_ids = set()
-        
         # Function to scroll and extract hotels
         def scroll_and_extract():
-            nonlocal all_hotels_data, processed_hotel_ids
-            
             # Find all hotel elements currently visible
-            hotel_elements = driver.find_elements(By.CSS_SELECTOR, 'li.item.journey.js-hotel-item')
+            hotel_elements = driver.find_elements(By.CSS_SELECTOR, HOTEL_ITEM_SELECTOR)
             
             # Extract data from each hotel element
             for hotel in hotel_elements:
                 try:
                     hotel_id = hotel.get_attribute('data-id')
-                    
-                    # Skip if we've already processed this hotel
-                    if hotel_id in processed_hotel_ids:
-                        continue
-                    
-                    # Extract data and add to our list
-                    hotel_data = extract_hotel_data(hotel)
-                    if hotel_data:
-                        all_hotels_data.append(hotel_data)
-                        processed_hotel_ids.add(hotel_id)
-                        print(f"Extracted data for hotel: {hotel_data['name']} (ID: {hotel_id})")
                 except StaleElementReferenceException:
-                    # If the element becomes stale, skip it
+                    # The hotel is found again by the next pass over the page
+                    stats['stale_skipped'] += 1
                     continue
+                
+                # Skip if we've already processed this hotel
+                if hotel_id in processed_hotel_ids:
+                    continue
+                
+                # Extract data and add to our list
+                hotel_data = extract_hotel_data(hotel, driver=driver, hotel_id=hotel_id, stats=stats)
+                if hotel_data:
+                    all_hotels_data.append(hotel_data)
+                    processed_hotel_ids.add(hotel_id)
+                    stats['extracted'] += 1
+                    if hotel_id in dead_letter:
+                        del dead_letter[hotel_id]
+                        stats['recovered'] += 1
+                    print(f"Extracted data for hotel: {hotel_data['name']} (ID: {hotel_id})")
+                else:
+                    if hotel_id not in dead_letter:
+                        dead_letter[hotel_id] = 0
+                        stats['dead_lettered'] += 1
+                    dead_letter[hotel_id] += 1
             
             return len(hotel_elements)
         
@@ -251,17 +497,23 @@ def main():
         print(f"Initially found {num_hotels} hotels")
         
         # Scroll and extract until no new hotels are found
-        last_count = 0
-        max_attempts = 30  # Limit the number of scroll attempts
+        last_count = num_hotels
         attempts = 0
+        idle_wait = None  # First empty wait since hotels were last loaded
         
-        while attempts < max_attempts:
-            # Scroll to the bottom of the page
+        while attempts < MAX_IDLE_SCROLLS:
+            # Scroll to the bottom of the page once the rate controller allows it
+            rate.acquire()
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             print("Scrolled to bottom of page")
             
-            # Wait for new content to load
-            time.sleep(2)
+            # Wait for new content only as long as it takes to arrive; its
+            # load time tells the rate controller whether to speed up
+            start = time.time()
+            appeared = wait_for_more_hotels(driver, last_count)
+            waited = time.time() - start
+            if appeared:
+                rate.record(waited)
             
             # Extract hotels again
             current_count = scroll_and_extract()
@@ -269,8 +521,19 @@ def main():
             # If we haven't found any new hotels after several attempts, break
             if current_count == last_count:
                 attempts += 1
-                print(f"No new hotels found. Attempt {attempts}/{max_attempts}")
+                if attempts == 1:
+                    idle_wait = waited
+                print(f"No new hotels found. Attempt {attempts}/{MAX_IDLE_SCROLLS}")
             else:
+                if not appeared:
+                    # The hotels arrived after the wait timed out
+                    rate.record(waited)
+                if idle_wait is not None:
+                    # More hotels came after all, so the empty wait was the
+                    # site being slow rather than the end of the list. Waits
+                    # at the real end of the list are never reported.
+                    rate.record(idle_wait)
+                    idle_wait = None
                 attempts = 0  # Reset attempts if we found new hotels
                 
             last_count = current_count
@@ -278,24 +541,60 @@ def main():
             # Print progress
             print(f"Total unique hotels found so far: {len(processed_hotel_ids)}")
         
-        print(f"Finished scraping. Found {len(all_hotels_data)} unique hotels.")
+        # Give hotels that failed during the crawl one more chance
+        if dead_letter:
+            print(f"Retrying {len(dead_letter)} hotels that failed extraction...")
+            retry_dead_letter(driver, dead_letter, all_hotels_data, processed_hotel_ids, stats)
         
-        # Save data to files
-        save_to_json(all_hotels_data, 'hotels_data.json')
-        save_to_csv(all_hotels_data, 'hotels_data.csv')
+        print(f"Finished scraping. Found {len(all_hotels_data)} unique hotels.")
         
     except TimeoutException:
-        print("Timed out waiting for the target hotel element to appear")
+        stats['error'] = f"listing did not load after {MAX_NAVIGATION_ATTEMPTS} attempts"
+        print(f"Timed out waiting for the target hotel element to appear after {MAX_NAVIGATION_ATTEMPTS} attempts")
     except Exception as e:
+        stats['error'] = f"{type(e).__name__}: {e}"
         print(f"An error occurred: {str(e)}")
+        if all_hotels_data:
+            print(f"Saving partial crawl of {len(all_hotels_data)} hotels")
+    
+    stats['failed'] = len(dead_letter)
+    stats['request_rate'] = rate.rate
+    if own_rate:
+        rate.close()
+    return all_hotels_data, stats, dead_letter
+
+def main(profile=DEFAULT_BROWSER_PROFILE):
+    # Options for the hotel search
+    CITY_CODE = "istanbul-250-60649-2"
+    CHECKIN, CHECKOUT = find_next_weekend()
+    ADULTS = 2
+    
+    target_url = get_hotel_url(CITY_CODE, CHECKIN, CHECKOUT, ADULTS)
+    
+    # Initialize the WebDriver
+    driver = create_driver(profile)
+    
+    try:
+        all_hotels_data, stats, dead_letter = crawl_hotels(driver, target_url)
     finally:
-        # Close the browser
-        # driver.quit()
-        pass
+        # The interactive profile leaves the browser open for inspection
+        if profile != 'interactive':
+            driver.quit()
+    
+    print_run_summary(stats, dead_letter)
+    
+    # Save data to files
+    if all_hotels_data:
+        save_to_json(all_hotels_data, 'hotels_data.json')
+        save_to_csv(all_hotels_data, 'hotels_data.csv')
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape hotel listings from obilet.com")
+    parser.add_argument('--profile', choices=BROWSER_PROFILES, default=DEFAULT_BROWSER_PROFILE,
+                        help="Browser profile: interactive (visible browser) or production (headless)")
+    args = parser.parse_args()
 
     # Time the script
     start_time = time.time()
-    main()
+    main(args.profile)
     print(f"Script finished in {time.time() - start_time:.2f} seconds")
@@ -0,0 +1,164 @@
+import time
+import sqlite3
+
+# In-memory state is private to one controller; pass a file path (e.g. the
+# crawl queue) to share one budget between processes
+PRIVATE_STATE = ':memory:'
+
+# Requests per second to a host. The initial rate matches the fixed 2
+# second pause the scraper used before
+INITIAL_RATE = 0.5
+MIN_RATE = 0.05
+MAX_RATE = 4.0
+
+# Additive increase per fast response, multiplicative decrease otherwise
+RATE_INCREASE = 0.1
+SLOW_DECREASE = 0.8
+ERROR_DECREASE = 0.5
+
+# Responses slower than this (in seconds) count as a sign of overload
+TARGET_LATENCY = 3.0
+
+# Weight of the newest sample in the smoothed latency
+LATENCY_SMOOTHING = 0.2
+
+BUSY_TIMEOUT_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS host_rates (
+    host TEXT PRIMARY KEY,
+    rate REAL NOT NULL,
+    next_slot REAL NOT NULL DEFAULT 0,
+    latency REAL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+
+def open_rate_state(path=PRIVATE_STATE):
+    """Open (and create if needed) the per-host rate table
+
+    Arguments:
+    path {str} -- SQLite file shared by all crawl processes, or ":memory:"
+
+    Returns:
+    sqlite3.Connection -- Connection in autocommit mode
+    """
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if path != PRIVATE_STATE:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def host_metrics(conn):
+    """Return the current rate, smoothed latency and counters of every host
+
+    Arguments:
+    conn -- Connection to a database that may not have a rate table yet
+    """
+    conn.executescript(SCHEMA)
+    return [dict(row) for row in conn.execute('SELECT * FROM host_rates ORDER BY host')]
+
+class RateController:
+    """Adaptive request pacing for one host (AIMD)
+
+    Requests are spaced 1/rate seconds apart. Every fast response raises the
+    rate by RATE_INCREASE; slow responses and errors cut it by SLOW_DECREASE
+    and ERROR_DECREASE. The rate and the time of the next free request slot
+    are stored in SQLite, so controllers for the same host in different
+    processes share one budget when they use the same state file.
+    """
+
+    def __init__(self, host, state_path=PRIVATE_STATE, initial_rate=INITIAL_RATE,
+                 min_rate=MIN_RATE, max_rate=MAX_RATE, target_latency=TARGET_LATENCY):
+        self.host = host
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.conn = open_rate_state(state_path)
+        self.conn.execute(
+            'INSERT OR IGNORE INTO host_rates (host, rate, updated_at) VALUES (?, ?, ?)',
+            (host, initial_rate, time.time())
+        )
+
+    def _begin(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn.execute('SELECT * FROM host_rates WHERE host = ?', (self.host,)).fetchone()
+
+    def acquire(self):
+        """Wait for the next request slot of this host
+
+        Returns:
+        float -- Seconds spent waiting
+        """
+        row = self._begin()
+        try:
+            slot = max(time.time(), row['next_slot'])
+            self.conn.execute(
+                'UPDATE host_rates SET next_slot = ? WHERE host = ?',
+                (slot + 1 / row['rate'], self.host)
+            )
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        delay = max(slot - time.time(), 0)
+        time.sleep(delay)
+        return delay
+
+    def record(self, latency=None, error=False):
+        """Adjust the rate after a response
+
+        Arguments:
+        latency {float} -- Seconds until the response arrived (None if unknown)
+        error {bool} -- The request failed or timed out
+
+        Returns:
+        float -- The new rate in requests per second
+        """
+        row = self._begin()
+        try:
+            now = time.time()
+            rate = row['rate']
+            smoothed = row['latency']
+            next_slot = row['next_slot']
+            if error:
+                rate *= ERROR_DECREASE
+            elif latency is not None:
+                smoothed = latency if smoothed is None else (
+                    LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * smoothed)
+                rate = rate * SLOW_DECREASE if latency > self.target_latency else rate + RATE_INCREASE
+            rate = min(max(rate, self.min_rate), self.max_rate)
+            if error:
+                # Every process backs off, not just the one that saw the error
+                next_slot = max(next_slot, now + 1 / rate)
+            self.conn.execute(
+                'UPDATE host_rates SET rate = ?, next_slot = ?, latency = ?, requests = requests + 1, '
+                'errors = errors + ?, updated_at = ? WHERE host = ?',
+                (rate, next_slot, smoothed, int(error), now, self.host)
+            )
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return rate
+
+    def metrics(self):
+        """Return the current rate, smoothed latency and counters of this host
+
+        Returns:
+        dict -- host, rate (requests per second), next_slot, latency,
+            requests, errors and updated_at
+        """
+        row = self.conn.execute('SELECT * FROM host_rates WHERE host = ?', (self.host,)).fetchone()
+        return dict(row)
+
+    @property
+    def rate(self):
+        return self.metrics()['rate']
+
+    def close(self):
+        self.conn.close()
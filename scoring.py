@@ -0,0 +1,265 @@
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+# NumPy and pandas are imported on first use by _load_numeric(), so that
+# callers which only need config_key() or DEFAULT_WEIGHTS start quickly
+np = pd = None
+
+
+def _load_numeric():
+    global np, pd
+    if pd is None:
+        import numpy as np
+        import pandas as pd
+
+# Weights reproducing the original value ratio (review_score / price * 1000)
+DEFAULT_WEIGHTS = {'value_ratio': 1.0}
+
+# Number of reviews at which review_confidence reaches ~63%
+REVIEW_CONFIDENCE_SCALE = 100.0
+
+# Maximum number of (dataset version, scoring config) results kept in memory
+SCORE_CACHE_SIZE = 32
+
+# name -> (expression, required). An expression takes the prepared frame and
+# returns one value per hotel. Hotels where a required expression is NaN are
+# not ranked; NaN from optional expressions counts as 0.
+SCORERS = {}
+
+
+def register_scorer(name, required=False):
+    """
+    Register a vectorized scorer under the given name.
+    The decorated function receives the frame built by prepare_frame() and
+    must return a Series or array aligned with it, computed column-wise.
+    """
+    def decorator(func):
+        SCORERS[name] = (func, required)
+        return func
+    return decorator
+
+
+def _to_float(values):
+    """
+    Convert a parsed column to plain float64 with NaN for missing values,
+    so scorers work on NumPy arrays instead of nullable extension types.
+    """
+    numeric = pd.to_numeric(values, errors='coerce')
+    return pd.Series(numeric.to_numpy(dtype=float, na_value=np.nan), index=values.index)
+
+
+def _parse_distinct(column, parse):
+    """
+    Apply a string parser to the distinct values of a column only.
+    Prices and distances repeat heavily across hotels and snapshots, so this
+    avoids running the regular expressions once per row.
+    """
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    parsed = parse(pd.Series(uniques, dtype='object')).to_numpy()
+    values = np.full(len(column), np.nan)
+    present = codes >= 0
+    values[present] = parsed[codes[present]]
+    return pd.Series(values, index=column.index)
+
+
+def _price_parser(text):
+    text = text.astype('string').str.extract(r'([\d.,]+)', expand=False)
+    text = text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    return _to_float(text)
+
+
+def _number_parser(text):
+    text = text.astype('string').str.replace(',', '.', regex=False)
+    return _to_float(text.str.extract(r'(\d+\.?\d*)', expand=False))
+
+
+def _parse_price_column(column):
+    """
+    Parse Turkish-formatted prices: dots are thousand separators and a
+    comma is the decimal separator.
+    Example: "17.345 TL" -> 17345.0
+    """
+    return _parse_distinct(column, _price_parser)
+
+
+def _parse_number_column(column):
+    """
+    Extract the first number from a text column, accepting a comma decimal.
+    Example: "1,2 km" -> 1.2, "2 gece" -> 2.0
+    """
+    return _parse_distinct(column, _number_parser)
+
+
+def prepare_frame(hotels):
+    """
+    Build a DataFrame with the numeric columns used by the scorers.
+    Accepts a list of hotel dictionaries or a DataFrame. String parsing is
+    done here, once per dataset, so that scoring is pure arithmetic.
+    """
+    _load_numeric()
+    df = hotels.copy() if isinstance(hotels, pd.DataFrame) else pd.DataFrame(hotels)
+    for column in ('price', 'daily_price', 'review_score', 'review_count',
+                   'star_rating', 'distance_to_center', 'nights', 'features'):
+        if column not in df.columns:
+            df[column] = None
+
+    df['numeric_price'] = _parse_price_column(df['price'])
+    df['numeric_daily_price'] = _parse_price_column(df['daily_price'])
+    df['numeric_review_score'] = _to_float(df['review_score'])
+    df['numeric_review_count'] = _to_float(df['review_count'])
+    df['numeric_star_rating'] = _to_float(df['star_rating'])
+    df['numeric_distance'] = _parse_number_column(df['distance_to_center'])
+    df['numeric_nights'] = _parse_number_column(df['nights'])
+
+    # Price used for the value ratio: daily price, falling back to total price
+    daily = df['numeric_daily_price'].where(df['numeric_daily_price'] > 0)
+    price = df['numeric_price'].where(df['numeric_price'] > 0)
+    df['score_price'] = daily.fillna(price)
+    return df
+
+
+@register_scorer('value_ratio', required=True)
+def _score_value_ratio(df):
+    return df['numeric_review_score'] / df['score_price'] * 1000
+
+
+@register_scorer('review_score', required=True)
+def _score_review_score(df):
+    return df['numeric_review_score']
+
+
+@register_scorer('review_confidence')
+def _score_review_confidence(df):
+    return 1 - np.exp(-df['numeric_review_count'] / REVIEW_CONFIDENCE_SCALE)
+
+
+@register_scorer('stars')
+def _score_stars(df):
+    return df['numeric_star_rating'] / 5
+
+
+@register_scorer('proximity')
+def _score_proximity(df):
+    return 1 / (1 + df['numeric_distance'])
+
+
+@register_scorer('nights')
+def _score_nights(df):
+    return df['numeric_nights']
+
+
+def _feature_bonus(df, feature_bonuses):
+    """
+    Sum of bonuses for the features each hotel has, computed over the
+    exploded feature column rather than row by row.
+    """
+    if not feature_bonuses:
+        return pd.Series(0.0, index=df.index)
+    features = df['features'].explode()
+    bonus = features.map(dict(feature_bonuses)).astype(float).fillna(0.0)
+    return bonus.groupby(level=0).sum().reindex(df.index, fill_value=0.0)
+
+
+def config_key(weights, feature_bonuses=None):
+    """
+    Return a hashable, order-independent key for a scoring configuration.
+    Zero weights are dropped so equivalent configurations share a key.
+    Feature bonuses without a 'features' weight use a weight of 1, so that
+    configuring bonuses is enough to have them count.
+    """
+    bonuses = tuple(sorted((name, float(b)) for name, b in (feature_bonuses or {}).items() if b))
+    if bonuses and not weights.get('features'):
+        weights = dict(weights, features=1.0)
+    weights = tuple(sorted((name, float(w)) for name, w in weights.items() if w))
+    return weights, bonuses
+
+
+@lru_cache(maxsize=None)
+def compile_scoring(key):
+    """
+    Compile a scoring configuration (as returned by config_key()) into a
+    function mapping a prepared frame to one score per hotel.
+    Unknown scorer names are rejected here rather than at scoring time.
+    """
+    _load_numeric()
+    weights, bonuses = key
+    unknown = [name for name, _ in weights if name != 'features' and name not in SCORERS]
+    if unknown:
+        raise ValueError(f"Unknown scorer(s): {', '.join(unknown)}")
+    if not weights:
+        raise ValueError("At least one scorer needs a non-zero weight")
+
+    terms = [(SCORERS[name][0], weight, SCORERS[name][1]) for name, weight in weights if name != 'features']
+    feature_weight = dict(weights).get('features', 0.0)
+
+    def score(df):
+        total = np.zeros(len(df))
+        valid = np.ones(len(df), dtype=bool)
+        for expression, weight, required in terms:
+            values = np.asarray(expression(df), dtype=float)
+            missing = np.isnan(values)
+            if required:
+                valid &= ~missing
+            total += weight * np.where(missing, 0.0, values)
+        if feature_weight:
+            total += feature_weight * _feature_bonus(df, bonuses).to_numpy()
+        return pd.Series(np.where(valid, total, np.nan), index=df.index)
+
+    return score
+
+
+# Shared by all dashboard sessions, which run in separate threads
+_score_cache = OrderedDict()
+_score_cache_lock = threading.Lock()
+
+
+def dataset_version(path):
+    """
+    Identify a dataset file by path, modification time and size.
+    Used as the cache key for prepared frames and scores.
+    """
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def score_frame(df, weights=None, feature_bonuses=None, version=None):
+    """
+    Score every hotel in a prepared frame in one pass.
+    Returns a Series of scores (NaN where a required input is missing).
+    When a dataset version is given, results are cached per
+    (version, scoring config).
+    """
+    key = config_key(weights or DEFAULT_WEIGHTS, feature_bonuses)
+    scorer = compile_scoring(key)
+    if version is None:
+        return scorer(df)
+
+    cache_key = (version, key)
+    with _score_cache_lock:
+        if cache_key in _score_cache:
+            _score_cache.move_to_end(cache_key)
+            return _score_cache[cache_key]
+
+    # Scored outside the lock; concurrent misses for one key just score twice
+    scores = scorer(df)
+    with _score_cache_lock:
+        _score_cache[cache_key] = scores
+        _score_cache.move_to_end(cache_key)
+        while len(_score_cache) > SCORE_CACHE_SIZE:
+            _score_cache.popitem(last=False)
+    return scores
+
+
+def rank_hotels(df, weights=None, feature_bonuses=None, top_n=10, version=None):
+    """
+    Return the top N hotels of a prepared frame by score, best first, with
+    the score in a 'value_score' column. Hotels without a score are skipped;
+    ties keep their original order.
+    """
+    scores = score_frame(df, weights, feature_bonuses, version)
+    top_index = scores.dropna().nlargest(top_n, keep='first').index
+    ranked = df.loc[top_index].copy()
+    ranked['value_score'] = scores.loc[top_index]
+    return ranked
@@ -1,102 +1,44 @@
 import json
-import csv
-import re
 import os
+import heapq
+import hashlib
+import argparse
 
-def extract_numeric_value(price_str):
-    """
-    Extract numeric value from price string.
-    Example: "17.345 TL" -> 17345
-    """
-    if not price_str or not isinstance(price_str, str):
-        return None
-    
-    # Remove currency symbol and extract numbers
-    # This regex finds all digits and dots/commas that might be used as separators
-    matches = re.findall(r'[\d.,]+', price_str)
-    if not matches:
-        return None
-    
-    # Take the first match (should be the price)
-    price_text = matches[0]
-    
-    # Replace thousand separator (dot in Turkish format) with empty string
-    # and decimal separator (comma in Turkish format) with dot
-    price_text = price_text.replace('.', '').replace(',', '.')
-    
-    try:
-        return float(price_text)
-    except ValueError:
-        return None
+import scoring
+from exporters import HOTEL_COLUMNS, write_csv
 
-def calculate_value_ratio(hotel):
-    """
-    Calculate value ratio (review_score / price) for a hotel.
-    Returns a tuple of (hotel_with_ratio, ratio) or (hotel, None) if ratio can't be calculated.
-    """
-    # Extract review score
-    try:
-        if not hotel.get('review_score'):
-            return hotel, None
-        review_score = float(hotel['review_score'])
-    except (ValueError, TypeError):
-        return hotel, None
-    
-    # Extract price from daily_price field
-    daily_price = hotel.get('daily_price', '')
-    price_value = extract_numeric_value(daily_price)
-    
-    # If daily_price is not available or invalid, try using the regular price
-    if not price_value:
-        price_value = extract_numeric_value(hotel.get('price', ''))
-    
-    # If we still don't have a valid price, return None for ratio
-    if not price_value or price_value <= 0:
-        return hotel, None
-    
-    # Calculate ratio (review score per 1000 TL)
-    ratio = (review_score / price_value) * 1000
-    
-    # Add ratio to hotel data
-    hotel_with_ratio = hotel.copy()
-    hotel_with_ratio['value_ratio'] = ratio
-    
-    return hotel_with_ratio, ratio
+# Scores and ranking kept between runs of the incremental mode
+DEFAULT_STATE_PATH = 'value_analysis_state.json'
+
+# Columns of top_value_hotels.csv
+OUTPUT_COLUMNS = HOTEL_COLUMNS + ('value_ratio',)
 
-def analyze_hotel_value(input_json_path, output_json_path, output_csv_path, top_n=10):
+def load_hotels(input_json_path):
     """
-    Analyze hotel value by calculating review_score/price ratio.
-    Output top N hotels to JSON and CSV files.
+    Read hotel data from a JSON file.
+    Returns the list of hotels, or None (after printing why) on error.
     """
     # Check if input file exists
     if not os.path.exists(input_json_path):
         print(f"Error: Input file {input_json_path} not found.")
-        return False
+        return None
     
     # Read hotel data from JSON file
     try:
         with open(input_json_path, 'r', encoding='utf-8') as f:
-            hotels = json.load(f)
+            return json.load(f)
     except json.JSONDecodeError:
         print(f"Error: Could not parse JSON from {input_json_path}.")
-        return False
+        return None
     except Exception as e:
         print(f"Error reading input file: {str(e)}")
-        return False
-    
-    # Calculate value ratio for each hotel
-    hotels_with_ratios = []
-    for hotel in hotels:
-        hotel_with_ratio, ratio = calculate_value_ratio(hotel)
-        if ratio is not None:  # Only include hotels with valid ratios
-            hotels_with_ratios.append((hotel_with_ratio, ratio))
-    
-    # Sort hotels by value ratio (descending)
-    hotels_with_ratios.sort(key=lambda x: x[1], reverse=True)
-    
-    # Take top N hotels
-    top_hotels = [hotel for hotel, _ in hotels_with_ratios[:top_n]]
-    
+        return None
+
+def save_top_hotels(top_hotels, output_json_path, output_csv_path, top_n):
+    """
+    Write the top hotels to JSON and CSV files.
+    Returns False if a file could not be written or there is nothing to write.
+    """
     # Save top hotels to JSON file
     try:
         with open(output_json_path, 'w', encoding='utf-8') as f:
@@ -112,20 +54,7 @@ def analyze_hotel_value(input_json_path, output_json_path, output_csv_path, top_
             print("No hotels with valid ratios found.")
             return False
         
-        # Get all possible keys from all dictionaries
-        fieldnames = set()
-        for hotel in top_hotels:
-            fieldnames.update(hotel.keys())
-        
-        with open(output_csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for hotel in top_hotels:
-                # Handle features list for CSV
-                hotel_copy = hotel.copy()
-                if 'features' in hotel_copy and isinstance(hotel_copy['features'], list):
-                    hotel_copy['features'] = ', '.join(hotel_copy['features'])
-                writer.writerow(hotel_copy)
+        write_csv(top_hotels, output_csv_path, OUTPUT_COLUMNS)
         print(f"Top {top_n} hotels by value saved to {output_csv_path}")
     except Exception as e:
         print(f"Error writing to CSV file: {str(e)}")
@@ -133,7 +62,163 @@ def analyze_hotel_value(input_json_path, output_json_path, output_csv_path, top_
     
     return True
 
-def main():
+def analyze_hotel_value(input_json_path, output_json_path, output_csv_path, top_n=10,
+                        weights=None, feature_bonuses=None):
+    """
+    Analyze hotel value by scoring every hotel with the scoring engine.
+    With the default weights the score is the review_score/price ratio.
+    Output top N hotels to JSON and CSV files, with the score in 'value_ratio'.
+    """
+    hotels = load_hotels(input_json_path)
+    if hotels is None:
+        return False
+    
+    # Score all hotels in one vectorized pass and take the top N.
+    # Hotels without a valid review score or price are left out.
+    try:
+        frame = scoring.prepare_frame(hotels)
+        ranked = scoring.rank_hotels(frame, weights or scoring.DEFAULT_WEIGHTS, feature_bonuses, top_n)
+    except ValueError as e:
+        print(f"Error: Invalid scoring configuration: {str(e)}")
+        return False
+    
+    top_hotels = []
+    for position, score in zip(ranked.index, ranked['value_score']):
+        hotel_with_ratio = hotels[position].copy()
+        hotel_with_ratio['value_ratio'] = float(score)
+        top_hotels.append(hotel_with_ratio)
+    
+    return save_top_hotels(top_hotels, output_json_path, output_csv_path, top_n)
+
+def hotel_key(hotel, position, occurrence=0):
+    """
+    Return the key identifying a hotel record across runs: its data-id,
+    falling back to its name, and to its position in the file as a last
+    resort. occurrence counts earlier records with the same id, so that
+    duplicates from merged crawls are kept and ranked separately, as in
+    analyze_hotel_value().
+    """
+    return f"{hotel.get('id') or hotel.get('name') or f'#{position}'}#{occurrence}"
+
+def hotel_fingerprint(hotel):
+    """
+    Return a short hash of a hotel record. Any change to the record, not
+    only to scored fields, changes the fingerprint so outputs stay current.
+    """
+    encoded = json.dumps(hotel, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=12).hexdigest()
+
+def load_state(state_path):
+    """
+    Load the incremental analysis state, or return None if there is none
+    or it cannot be read (the next run then recomputes everything).
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_state(state, state_path):
+    """
+    Write the incremental analysis state atomically.
+    """
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, state_path)
+
+def analyze_hotel_value_incremental(input_json_path, output_json_path, output_csv_path, top_n=10,
+                                    weights=None, feature_bonuses=None,
+                                    state_path=DEFAULT_STATE_PATH):
+    """
+    Incremental version of analyze_hotel_value().
+    Scores are kept between runs in state_path as hotel key -> (fingerprint,
+    score) together with the current top N. Only inserted and updated hotels
+    are re-scored, deleted hotels are dropped, and the output files are only
+    rewritten when the ranking changes.
+    """
+    # Compared with the stored state, so use the JSON form of the key
+    config = json.loads(json.dumps(scoring.config_key(weights or scoring.DEFAULT_WEIGHTS, feature_bonuses)))
+    try:
+        input_stat = os.stat(input_json_path)
+        input_version = [input_stat.st_mtime_ns, input_stat.st_size]
+    except OSError:
+        input_version = None
+    outputs_exist = os.path.exists(output_json_path) and os.path.exists(output_csv_path)
+    
+    state = load_state(state_path)
+    if state is None or state.get('config') != config:
+        # No usable state for this scoring configuration: score everything
+        state = {'config': config, 'input_version': None, 'top_n': top_n, 'hotels': {}, 'ranking': []}
+    
+    # Nothing to do if neither the input file nor the settings changed
+    if (input_version is not None and state['input_version'] == input_version
+            and state['top_n'] == top_n and outputs_exist):
+        print(f"No changes in {input_json_path}; top {top_n} hotels are up to date.")
+        return True
+    
+    hotels = load_hotels(input_json_path)
+    if hotels is None:
+        return False
+    
+    # Diff the new crawl against the stored fingerprints
+    previous = state['hotels']
+    current = {}
+    changed = []  # (key, position, fingerprint)
+    occurrences = {}
+    for position, hotel in enumerate(hotels):
+        base = hotel_key(hotel, position)
+        occurrences[base] = occurrences.get(base, -1) + 1
+        key = hotel_key(hotel, position, occurrences[base])
+        fingerprint = hotel_fingerprint(hotel)
+        entry = previous.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            current[key] = [fingerprint, entry[1], position]
+        else:
+            changed.append((key, position, fingerprint))
+    deleted = previous.keys() - {key for key, _, _ in changed} - current.keys()
+    
+    # Score only the inserted and updated hotels
+    if changed:
+        try:
+            frame = scoring.prepare_frame([hotels[position] for _, position, _ in changed])
+            scores = scoring.score_frame(frame, weights or scoring.DEFAULT_WEIGHTS, feature_bonuses).tolist()
+        except ValueError as e:
+            print(f"Error: Invalid scoring configuration: {str(e)}")
+            return False
+        for (key, position, fingerprint), score in zip(changed, scores):
+            current[key] = [fingerprint, None if score != score else score, position]
+    
+    print(f"{len(changed)} hotels inserted or updated, {len(deleted)} deleted, "
+          f"{len(current) - len(changed)} unchanged")
+    
+    # Ties are broken by position in the input, as in analyze_hotel_value()
+    scored = ((entry[1], -entry[2], key) for key, entry in current.items() if entry[1] is not None)
+    ranking = [[key, score, current[key][0]] for score, _, key in heapq.nlargest(top_n, scored)]
+    
+    state['hotels'] = {key: entry[:2] for key, entry in current.items()}
+    state['input_version'] = input_version
+    
+    if ranking == state['ranking'] and state['top_n'] == top_n and outputs_exist:
+        print(f"Ranking unchanged; {output_json_path} and {output_csv_path} were not rewritten.")
+        save_state(state, state_path)
+        return True
+    
+    top_hotels = []
+    for key, score, _ in ranking:
+        hotel_with_ratio = hotels[current[key][2]].copy()
+        hotel_with_ratio['value_ratio'] = score
+        top_hotels.append(hotel_with_ratio)
+    
+    success = save_top_hotels(top_hotels, output_json_path, output_csv_path, top_n)
+    if success:
+        state['ranking'] = ranking
+        state['top_n'] = top_n
+        save_state(state, state_path)
+    return success
+
+def main(incremental=False, state_path=DEFAULT_STATE_PATH):
     # File paths
     input_json_path = 'hotels_data.json'
     output_json_path = 'top_value_hotels.json'
@@ -142,8 +227,18 @@ def main():
     # Number of top hotels to output
     top_n = 100
     
+    # Scorer weights (see scoring.SCORERS) and optional per-feature bonuses.
+    # The defaults rank by review_score / price * 1000.
+    weights = scoring.DEFAULT_WEIGHTS
+    feature_bonuses = None
+    
     # Analyze hotel value and output top hotels
-    success = analyze_hotel_value(input_json_path, output_json_path, output_csv_path, top_n)
+    if incremental:
+        success = analyze_hotel_value_incremental(input_json_path, output_json_path, output_csv_path, top_n,
+                                                  weights, feature_bonuses, state_path)
+    else:
+        success = analyze_hotel_value(input_json_path, output_json_path, output_csv_path, top_n,
+                                      weights, feature_bonuses)
     
     if success:
         print(f"Successfully analyzed hotel value and output top {top_n} hotels.")
@@ -178,4 +273,10 @@ def main():
         print("Failed to analyze hotel value.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Rank hotels by value")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Re-score only hotels that changed since the last run")
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH,
+                        help="State file used by --incremental")
+    args = parser.parse_args()
+    main(args.incremental, args.state)